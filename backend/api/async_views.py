@@ -0,0 +1,163 @@
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    MethodNotAllowed,
+    NotAuthenticated,
+    NotFound
+)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .caching import catalog_snapshot
+from .executors import database_sync_to_async
+from .renderers import ORJSONRenderer
+from .serializers import AvatarSerializer, IngredientSerializer, TagSerializer
+from .utils import generate_shopping_list
+from .views import IngredientViewSet, TagViewSet
+from receipts.models import Receipt
+
+CATALOGS = {
+    'tags': (TagSerializer, TagViewSet),
+    'ingredients': (IngredientSerializer, IngredientViewSet),
+}
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(
+        ORJSONRenderer().render(data),
+        content_type=ORJSONRenderer.media_type,
+        status=status
+    )
+
+
+def error_response(error):
+    response = json_response(
+        error.detail if isinstance(error.detail, (list, dict))
+        else {'detail': error.detail},
+        error.status_code
+    )
+    if isinstance(error, (NotAuthenticated, AuthenticationFailed)):
+        response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def async_api_view(*methods):
+    if 'GET' in methods:
+        methods = (*methods, 'HEAD')
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+                return await view(request, *args, **kwargs)
+            except MethodNotAllowed as error:
+                response = error_response(error)
+                response['Allow'] = ', '.join(methods)
+                return response
+            except APIException as error:
+                return error_response(error)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def api_request(request):
+    return Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ]
+    )
+
+
+def authenticated_user(request):
+    if not request.user.is_authenticated:
+        raise NotAuthenticated
+    return request.user
+
+
+@async_api_view('GET')
+async def receipt_short_link(request, receipt_id):
+    if not await database_sync_to_async(
+        Receipt.objects.filter(id=receipt_id).exists
+    )():
+        raise NotFound
+    return HttpResponseRedirect(
+        request.build_absolute_uri(f'/recipes/{receipt_id}/')
+    )
+
+
+def shopping_list(request):
+    return generate_shopping_list(authenticated_user(api_request(request)))
+
+
+@async_api_view('GET')
+async def download_shopping_cart(request):
+    return HttpResponse(
+        await database_sync_to_async(shopping_list)(request),
+        content_type='text/plain; charset=utf-8',
+        headers={
+            'Content-Disposition': 'inline; filename="shopping_list.txt"'
+        }
+    )
+
+
+def catalog_view(name):
+    serializer, viewset = CATALOGS[name]
+    viewset = viewset.as_view({'get': 'list'})
+
+    @async_api_view('GET')
+    async def catalog(request):
+        if request.GET:
+            return await database_sync_to_async(viewset)(request)
+        content = await database_sync_to_async(catalog_snapshot)(
+            name, serializer
+        )
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                content, content_type=ORJSONRenderer.media_type
+            )
+        response['ETag'] = etag
+        return response
+
+    catalog.__name__ = f'{name}_catalog'
+    return catalog
+
+
+def put_avatar(request):
+    request = api_request(request)
+    serializer = AvatarSerializer(
+        authenticated_user(request), data=request.data, partial=True
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return serializer.data
+
+
+def delete_avatar(request):
+    user = authenticated_user(api_request(request))
+    user.avatar = None
+    user.save()
+
+
+@async_api_view('PUT', 'DELETE')
+async def avatar(request):
+    if request.method == 'PUT':
+        return json_response(
+            await database_sync_to_async(put_avatar)(request)
+        )
+    await database_sync_to_async(delete_avatar)(request)
+    return HttpResponse(status=status.HTTP_204_NO_CONTENT)
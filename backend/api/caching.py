@@ -0,0 +1,192 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from receipts.constants import (
+    CATALOG_CACHE_KEY,
+    CATALOG_CACHE_TTL,
+    RECEIPT_CARD_CACHE_KEY,
+    RECEIPT_CARD_CACHE_TTL,
+    USER_RECEIPT_IDS_CACHE_KEY,
+    USER_RECEIPT_IDS_CACHE_TTL
+)
+from receipts.models import Favourite, Receipt, ShoppingCart, Subscription
+
+from .fieldsets import Fieldset
+from .listings import receipt_rows, render_receipts
+from .renderers import ORJSONRenderer
+
+USER_RECEIPT_IDS = {
+    'favourites': lambda user_id: Favourite.objects.filter(
+        user_id=user_id
+    ).values_list('receipt_id', flat=True),
+    'shopping_cart': lambda user_id: ShoppingCart.objects.filter(
+        user_id=user_id
+    ).values_list('receipt_id', flat=True),
+    'subscriptions': lambda user_id: Subscription.objects.filter(
+        follower_id=user_id
+    ).values_list('author_id', flat=True),
+}
+
+
+def receipt_cards(receipt_versions):
+    keys = {
+        receipt_id: RECEIPT_CARD_CACHE_KEY.format(receipt_id, version)
+        for receipt_id, version in receipt_versions
+    }
+    cached = cache.get_many(keys.values())
+    cards = {
+        receipt_id: cached[key]
+        for receipt_id, key in keys.items() if key in cached
+    }
+    missing = [receipt_id for receipt_id in keys if receipt_id not in cards]
+    if missing:
+        rendered = {
+            card['id']: card
+            for card in render_receipts(
+                receipt_rows(Receipt.objects.filter(id__in=missing)), None
+            )
+        }
+        cache.set_many(
+            {keys[receipt_id]: card for receipt_id, card in rendered.items()},
+            RECEIPT_CARD_CACHE_TTL
+        )
+        cards.update(rendered)
+    return cards
+
+
+def user_receipt_ids(user, kind):
+    if not user.is_authenticated:
+        return frozenset()
+    key = USER_RECEIPT_IDS_CACHE_KEY.format(user.pk, kind)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(USER_RECEIPT_IDS[kind](user.pk))
+        cache.set(key, ids, USER_RECEIPT_IDS_CACHE_TTL)
+    return ids
+
+
+def invalidate_user_receipt_ids(user_id, kind):
+    cache.delete(USER_RECEIPT_IDS_CACHE_KEY.format(user_id, kind))
+
+
+def absolute_url(request, url):
+    if url is None or request is None:
+        return url
+    return request.build_absolute_uri(url)
+
+
+def requested_receipt_ids(user, fieldset):
+    author = fieldset.nested('author')
+    requested = {
+        'favourites': fieldset.includes('is_favorited'),
+        'shopping_cart': fieldset.includes('is_in_shopping_cart'),
+        'subscriptions': (
+            fieldset.includes('author') and author.includes('is_subscribed')
+        ),
+    }
+    return {
+        kind: user_receipt_ids(user, kind)
+        for kind, included in requested.items() if included
+    }
+
+
+def render_cached_receipts(receipt_versions, request, fieldset=None):
+    fieldset = fieldset or Fieldset()
+    cards = receipt_cards(receipt_versions)
+    ids = requested_receipt_ids(request.user, fieldset)
+    flags = {
+        name: ids[kind]
+        for name, kind in (
+            ('is_favorited', 'favourites'),
+            ('is_in_shopping_cart', 'shopping_cart'),
+        )
+        if kind in ids
+    }
+    rendered = []
+    for receipt_id, _ in receipt_versions:
+        if receipt_id not in cards:
+            continue
+        source = cards[receipt_id]
+        card = {
+            **fieldset.project(source),
+            **{name: receipt_id in flagged for name, flagged in flags.items()},
+        }
+        if 'image' in card:
+            card['image'] = absolute_url(request, card['image'])
+        if 'author' in card:
+            author = card['author'] = dict(card['author'])
+            if 'subscriptions' in ids:
+                author['is_subscribed'] = (
+                    source['author']['id'] in ids['subscriptions']
+                )
+            if 'avatar' in author:
+                author['avatar'] = absolute_url(request, author['avatar'])
+        rendered.append(card)
+    return rendered
+
+
+def make_etag(request, *parts):
+    digest = hashlib.md5(':'.join(
+        map(str, (request.get_host(), request.GET.urlencode(), *parts))
+    ).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def receipt_etag(request, state):
+    user = request.user
+    return make_etag(
+        request,
+        state['id'],
+        state['version'],
+        state['id'] in user_receipt_ids(user, 'favourites'),
+        state['id'] in user_receipt_ids(user, 'shopping_cart'),
+        state['author_id'] in user_receipt_ids(user, 'subscriptions')
+    )
+
+
+def receipt_list_etag(request, count, page, fieldset):
+    return make_etag(
+        request,
+        count,
+        list(page),
+        *(
+            f'{kind}={sorted(ids)}' for kind, ids in
+            requested_receipt_ids(request.user, fieldset).items()
+        )
+    )
+
+
+def conditional_response(request, etag, last_modified):
+    if last_modified is not None and not request.user.is_authenticated:
+        last_modified = int(last_modified.timestamp())
+    else:
+        last_modified = None
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def catalog_snapshot(name, serializer):
+    key = CATALOG_CACHE_KEY.format(name)
+    content = cache.get(key)
+    if content is None:
+        content = ORJSONRenderer().render(
+            serializer(serializer.Meta.model.objects.all(), many=True).data
+        )
+        cache.set(key, content, CATALOG_CACHE_TTL)
+    return content
+
+
+def invalidate_catalog_snapshot(name):
+    cache.delete(CATALOG_CACHE_KEY.format(name))
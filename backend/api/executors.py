@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+execute_wrappers = ContextVar('execute_wrappers', default=())
+
+database_executor = ThreadPoolExecutor(
+    settings.ASYNC_DATABASE_THREADS, thread_name_prefix='database'
+)
+
+
+def execute_in_context(execute, sql, params, many, context):
+    for wrapper in reversed(execute_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def wrap_execute(wrapper):
+    token = execute_wrappers.set((*execute_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        execute_wrappers.reset(token)
+
+
+def database_sync_to_async(function):
+    @wraps(function)
+    def run(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(
+        run, thread_sensitive=False, executor=database_executor
+    )
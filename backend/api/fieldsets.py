@@ -0,0 +1,85 @@
+from django.utils.functional import cached_property
+
+
+def fields_tree(value, profiles):
+    tree = {}
+    for token in value.split(','):
+        token = token.strip()
+        for path in profiles.get(token, (token,)):
+            node = tree
+            for name in path.split('.'):
+                if name:
+                    node = node.setdefault(name, {})
+    return tree
+
+
+class Fieldset:
+
+    def __init__(self, fields=None, omit=None):
+        self.fields = fields or None
+        self.omit = omit or {}
+
+    @classmethod
+    def from_request(cls, request, profiles):
+        params = request.query_params if request is not None else {}
+        return cls(
+            fields_tree(params.get('fields', ''), profiles),
+            fields_tree(params.get('omit', ''), profiles)
+        )
+
+    def includes(self, name):
+        if self.fields is not None and name not in self.fields:
+            return False
+        return name not in self.omit or bool(self.omit[name])
+
+    def project(self, value):
+        if isinstance(value, list):
+            return [self.project(item) for item in value]
+        if not isinstance(value, dict) or (
+            self.fields is None and not self.omit
+        ):
+            return value
+        return {
+            name: self.nested(name).project(item)
+            for name, item in value.items() if self.includes(name)
+        }
+
+    def nested(self, name):
+        return Fieldset(
+            self.fields.get(name) if self.fields is not None else None,
+            self.omit.get(name)
+        )
+
+
+class SparseFieldsMixin:
+
+    @cached_property
+    def fieldset(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        fieldset = self.context.get('fieldset') or Fieldset()
+        for name in reversed(names):
+            fieldset = fieldset.nested(name)
+        return fieldset
+
+    def get_fields(self):
+        return {
+            name: field
+            for name, field in super().get_fields().items()
+            if self.fieldset.includes(name)
+        }
+
+
+class SparseFieldsViewMixin:
+    field_profiles = {}
+
+    @cached_property
+    def fieldset(self):
+        return Fieldset.from_request(self.request, self.field_profiles)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fieldset': self.fieldset}
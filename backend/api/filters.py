@@ -1,17 +1,78 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import BooleanField, Case, Q, When
 from django_filters import rest_framework
-from receipts.models import Ingredient, Receipt, Tag
+from rest_framework.exceptions import ValidationError
+from receipts.constants import (
+    INGREDIENT_INDEX_IDS_LIMIT,
+    INGREDIENT_SEARCH_LIMIT,
+    RECEIPT_IDS_LIMIT,
+    RECEIPT_ORDERINGS
+)
+from receipts.models import Ingredient, IngredientInReceipt, Receipt, Tag
+
+from .indexes import ingredient_recipe_index
+from .search import ingredient_index
+
+
+def recipes_containing(ingredient_ids):
+    return IngredientInReceipt.objects.filter(
+        ingredient_id__in=ingredient_ids
+    ).values('receipt_id')
+
+
+class NumberInFilter(rest_framework.BaseInFilter, rest_framework.NumberFilter):
+    pass
 
 
 class IngredientFilter(rest_framework.FilterSet):
     name = rest_framework.CharFilter(
-        field_name='name',
-        lookup_expr='startswith'
+        method='filter_name',
+        label='Название'
+    )
+    fuzzy = rest_framework.BooleanFilter(
+        method='filter_noop',
+        label='Нечеткий поиск'
+    )
+    limit = rest_framework.NumberFilter(
+        method='filter_noop',
+        label='Количество результатов нечеткого поиска',
+        min_value=1
     )
 
     class Meta:
         model = Ingredient
         fields = []
 
+    def filter_noop(self, ingredients, name, value):
+        return ingredients
+
+    def filter_name(self, ingredients, name, value):
+        if not self.form.cleaned_data.get('fuzzy'):
+            return ingredients.filter(name__startswith=value)
+        limit = int(
+            self.form.cleaned_data.get('limit') or INGREDIENT_SEARCH_LIMIT
+        )
+        if connections[ingredients.db].vendor == 'postgresql':
+            return ingredients.filter(
+                Q(name__istartswith=value) | Q(name__trigram_similar=value)
+            ).annotate(
+                is_prefix=Case(
+                    When(name__istartswith=value, then=True),
+                    default=False,
+                    output_field=BooleanField()
+                ),
+                similarity=TrigramSimilarity('name', value)
+            ).order_by('-is_prefix', '-similarity', 'name')[:limit]
+        ingredient_index.ensure_fresh()
+        ids = ingredient_index.search(value, limit)
+        if not ids:
+            return ingredients.none()
+        return ingredients.filter(id__in=ids).order_by(
+            Case(*[When(id=pk, then=position)
+                   for position, pk in enumerate(ids)])
+        )
+
 
 class ReceiptFilter(rest_framework.FilterSet):
     author = rest_framework.CharFilter(
@@ -23,7 +84,15 @@ class ReceiptFilter(rest_framework.FilterSet):
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
-        conjoined=False
+        method='filter_tags'
+    )
+    ingredients = NumberInFilter(
+        method='filter_ingredients',
+        label='ID продуктов, которые должны быть в рецепте'
+    )
+    exclude_ingredients = NumberInFilter(
+        method='filter_exclude_ingredients',
+        label='ID продуктов, которых не должно быть в рецепте'
     )
     is_in_shopping_cart = rest_framework.BooleanFilter(
         method='filter_is_in_shopping_cart',
@@ -33,10 +102,97 @@ class ReceiptFilter(rest_framework.FilterSet):
         method='filter_is_favorited',
         label='В избранном'
     )
+    cooking_time_min = rest_framework.NumberFilter(
+        field_name='cooking_time',
+        lookup_expr='gte',
+        label='Минимальное время приготовления'
+    )
+    cooking_time_max = rest_framework.NumberFilter(
+        field_name='cooking_time',
+        lookup_expr='lte',
+        label='Максимальное время приготовления'
+    )
+    ordering = rest_framework.ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in RECEIPT_ORDERINGS],
+        method='filter_ordering',
+        label='Сортировка'
+    )
+    ids = NumberInFilter(
+        method='filter_ids',
+        label='ID рецептов'
+    )
 
     class Meta:
         model = Receipt
-        fields = ['author', 'tags', 'is_in_shopping_cart', 'is_favorited']
+        fields = [
+            'author',
+            'tags',
+            'ingredients',
+            'exclude_ingredients',
+            'is_in_shopping_cart',
+            'is_favorited',
+            'cooking_time_min',
+            'cooking_time_max',
+            'ordering',
+            'ids'
+        ]
+
+    def filter_tags(self, recipes, name, value):
+        if not value:
+            return recipes
+        return recipes.with_any_tags([tag.id for tag in value])
+
+    # Индекс рецептов по продуктам хранится в памяти каждого воркера:
+    # изменения из других воркеров попадают в него не позже чем через
+    # SEARCH_INDEX_TTL секунд. Если индекс находит больше
+    # INGREDIENT_INDEX_IDS_LIMIT рецептов, фильтр переходит на подзапрос,
+    # чтобы не передавать в IN сотни тысяч параметров.
+    def filter_ingredients(self, recipes, name, value):
+        ingredient_ids = [int(pk) for pk in value]
+        excluded = [
+            int(pk)
+            for pk in self.form.cleaned_data.get('exclude_ingredients') or ()
+        ]
+        ingredient_recipe_index.ensure_fresh()
+        receipt_ids = ingredient_recipe_index.with_all(ingredient_ids)
+        if excluded:
+            receipt_ids = receipt_ids - ingredient_recipe_index.with_any(
+                excluded
+            )
+        if len(receipt_ids) <= INGREDIENT_INDEX_IDS_LIMIT:
+            return recipes.filter(pk__in=list(receipt_ids))
+        for ingredient_id in ingredient_ids:
+            recipes = recipes.filter(
+                pk__in=recipes_containing([ingredient_id])
+            )
+        if excluded:
+            recipes = recipes.exclude(pk__in=recipes_containing(excluded))
+        return recipes
+
+    def filter_exclude_ingredients(self, recipes, name, value):
+        if self.form.cleaned_data.get('ingredients'):
+            return recipes
+        ingredient_ids = [int(pk) for pk in value]
+        ingredient_recipe_index.ensure_fresh()
+        receipt_ids = ingredient_recipe_index.with_any(ingredient_ids)
+        if len(receipt_ids) <= INGREDIENT_INDEX_IDS_LIMIT:
+            return recipes.exclude(pk__in=list(receipt_ids))
+        return recipes.exclude(pk__in=recipes_containing(ingredient_ids))
+
+    def filter_ordering(self, recipes, name, value):
+        return recipes.order_by(*RECEIPT_ORDERINGS[value])
+
+    def filter_ids(self, recipes, name, value):
+        ids = list(dict.fromkeys(int(pk) for pk in value))
+        if len(ids) > RECEIPT_IDS_LIMIT:
+            raise ValidationError({
+                'ids': f'Можно запросить не более {RECEIPT_IDS_LIMIT} '
+                       f'рецептов.'
+            })
+        return recipes.filter(pk__in=ids).order_by(
+            Case(*[When(pk=pk, then=position)
+                   for position, pk in enumerate(ids)])
+        )
 
     def filter_is_in_shopping_cart(self, recipes, name, value):
         user = self.request.user
@@ -0,0 +1,249 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict
+
+import numpy as np
+from pyroaring import BitMap
+from scipy.sparse import csr_matrix
+
+from receipts.constants import COOKABLE_OVERRIDES_LIMIT, SEARCH_INDEX_TTL
+from receipts.models import IngredientInReceipt
+
+
+class InMemoryIndex(ABC):
+    ttl = SEARCH_INDEX_TTL
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+
+    @abstractmethod
+    def load(self):
+        pass
+
+    def build(self):
+        with self._lock:
+            self.load()
+            self._built_at = time.monotonic()
+
+    def is_fresh(self):
+        return (
+            self._built_at is not None
+            and time.monotonic() - self._built_at < self.ttl
+        )
+
+    def invalidate(self):
+        self._built_at = None
+
+    def ensure_fresh(self):
+        if self.is_fresh():
+            return
+        with self._lock:
+            if not self.is_fresh():
+                self.build()
+
+
+class IngredientRecipeIndex(InMemoryIndex):
+
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+        self.recipe_ingredients = {}
+
+    def load(self):
+        postings = defaultdict(BitMap)
+        recipe_ingredients = defaultdict(set)
+        rows = IngredientInReceipt.objects.values_list(
+            'ingredient_id', 'receipt_id'
+        ).iterator()
+        for ingredient_id, receipt_id in rows:
+            postings[ingredient_id].add(receipt_id)
+            recipe_ingredients[receipt_id].add(ingredient_id)
+        self.postings = dict(postings)
+        self.recipe_ingredients = dict(recipe_ingredients)
+
+    def add(self, ingredient_id, receipt_id):
+        with self._lock:
+            self.postings.setdefault(ingredient_id, BitMap()).add(receipt_id)
+            self.recipe_ingredients.setdefault(receipt_id, set()).add(
+                ingredient_id
+            )
+
+    def discard(self, ingredient_id, receipt_id):
+        with self._lock:
+            self.postings.get(ingredient_id, BitMap()).discard(receipt_id)
+            self.recipe_ingredients.get(receipt_id, set()).discard(
+                ingredient_id
+            )
+
+    def refresh_recipes(self, receipt_ids):
+        current = defaultdict(set)
+        rows = IngredientInReceipt.objects.filter(
+            receipt_id__in=receipt_ids
+        ).values_list('receipt_id', 'ingredient_id')
+        for receipt_id, ingredient_id in rows:
+            current[receipt_id].add(ingredient_id)
+        with self._lock:
+            for receipt_id in receipt_ids:
+                previous = self.recipe_ingredients.get(receipt_id, set())
+                for ingredient_id in previous - current[receipt_id]:
+                    self.discard(ingredient_id, receipt_id)
+                for ingredient_id in current[receipt_id] - previous:
+                    self.add(ingredient_id, receipt_id)
+
+    def with_all(self, ingredient_ids):
+        return BitMap.intersection(
+            *[self.postings.get(pk, BitMap()) for pk in ingredient_ids]
+        )
+
+    def with_any(self, ingredient_ids):
+        return BitMap.union(
+            BitMap(),
+            *[self.postings.get(pk, BitMap()) for pk in ingredient_ids]
+        )
+
+
+class CookableIndex(InMemoryIndex):
+
+    def __init__(self):
+        super().__init__()
+        self.matrix = csr_matrix((0, 0), dtype=np.int32)
+        self.receipt_ids = np.empty(0, dtype=np.int64)
+        self.sizes = np.empty(0, dtype=np.int32)
+        self.rows = {}
+        self.stale = np.empty(0, dtype=bool)
+        self.overrides = {}
+
+    def load(self):
+        receipt_ids = array('q')
+        ingredient_ids = array('q')
+        rows = IngredientInReceipt.objects.values_list(
+            'receipt_id', 'ingredient_id'
+        ).iterator()
+        for receipt_id, ingredient_id in rows:
+            receipt_ids.append(receipt_id)
+            ingredient_ids.append(ingredient_id)
+        receipt_ids = np.frombuffer(receipt_ids, dtype=np.int64)
+        ingredient_ids = np.frombuffer(ingredient_ids, dtype=np.int64)
+        unique_ids, row_numbers = np.unique(receipt_ids, return_inverse=True)
+        columns = int(ingredient_ids.max()) + 1 if len(ingredient_ids) else 0
+        self.matrix = csr_matrix(
+            (
+                np.ones(len(ingredient_ids), dtype=np.int32),
+                (row_numbers, ingredient_ids)
+            ),
+            shape=(len(unique_ids), columns)
+        )
+        self.matrix.sum_duplicates()
+        self.receipt_ids = unique_ids
+        self.sizes = np.diff(self.matrix.indptr).astype(np.int32)
+        self.rows = {
+            receipt_id: row
+            for row, receipt_id in enumerate(unique_ids.tolist())
+        }
+        self.stale = np.zeros(len(unique_ids), dtype=bool)
+        self.overrides = {}
+
+    def ingredients_of(self, receipt_id):
+        if receipt_id in self.overrides:
+            return set(self.overrides[receipt_id])
+        row = self.rows.get(receipt_id)
+        if row is None:
+            return set()
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        return set(self.matrix.indices[start:end].tolist())
+
+    def override(self, receipt_id, ingredient_ids):
+        with self._lock:
+            row = self.rows.get(receipt_id)
+            if row is not None:
+                self.stale[row] = True
+            self.overrides[receipt_id] = frozenset(ingredient_ids)
+            if len(self.overrides) > COOKABLE_OVERRIDES_LIMIT:
+                self.invalidate()
+
+    def add(self, ingredient_id, receipt_id):
+        with self._lock:
+            self.override(
+                receipt_id, self.ingredients_of(receipt_id) | {ingredient_id}
+            )
+
+    def discard(self, ingredient_id, receipt_id):
+        with self._lock:
+            self.override(
+                receipt_id, self.ingredients_of(receipt_id) - {ingredient_id}
+            )
+
+    def refresh_recipes(self, receipt_ids):
+        current = defaultdict(set)
+        rows = IngredientInReceipt.objects.filter(
+            receipt_id__in=receipt_ids
+        ).values_list('receipt_id', 'ingredient_id')
+        for receipt_id, ingredient_id in rows:
+            current[receipt_id].add(ingredient_id)
+        for receipt_id in receipt_ids:
+            self.override(receipt_id, current[receipt_id])
+
+    def rank(self, ingredient_ids, max_missing=None):
+        with self._lock:
+            pantry = np.zeros(self.matrix.shape[1], dtype=np.int32)
+            known = [pk for pk in ingredient_ids if 0 <= pk < len(pantry)]
+            pantry[known] = 1
+            fresh = ~self.stale
+            receipt_ids = self.receipt_ids[fresh]
+            have = (self.matrix @ pantry)[fresh]
+            sizes = self.sizes[fresh]
+            if self.overrides:
+                pantry_ids = set(ingredient_ids)
+                receipt_ids = np.concatenate(
+                    (receipt_ids, np.fromiter(self.overrides, np.int64))
+                )
+                have = np.concatenate((have, np.fromiter(
+                    (len(ids & pantry_ids) for ids in self.overrides.values()),
+                    np.int32
+                )))
+                sizes = np.concatenate((sizes, np.fromiter(
+                    (len(ids) for ids in self.overrides.values()), np.int32
+                )))
+        missing = sizes - have
+        matches = have > 0
+        if max_missing is not None:
+            matches &= missing <= max_missing
+        receipt_ids = receipt_ids[matches]
+        missing = missing[matches]
+        coverage = have[matches] / sizes[matches]
+        order = np.lexsort((-receipt_ids, missing, -coverage))
+        return CookableRanking(
+            receipt_ids[order], coverage[order], missing[order]
+        )
+
+
+class CookableRanking:
+
+    def __init__(self, receipt_ids, coverage, missing):
+        self.receipt_ids = receipt_ids
+        self.coverage = coverage
+        self.missing = missing
+
+    def __len__(self):
+        return len(self.receipt_ids)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(zip(
+                self.receipt_ids[key].tolist(),
+                self.coverage[key].tolist(),
+                self.missing[key].tolist()
+            ))
+        return (
+            int(self.receipt_ids[key]),
+            float(self.coverage[key]),
+            int(self.missing[key])
+        )
+
+
+ingredient_recipe_index = IngredientRecipeIndex()
+cookable_index = CookableIndex()
+RECIPE_INGREDIENT_INDEXES = (ingredient_recipe_index, cookable_index)
@@ -0,0 +1,191 @@
+import asyncio
+import atexit
+import json
+import logging
+import re
+import threading
+import traceback
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from receipts.constants import N_PLUS_ONE_THRESHOLD, SLOW_QUERY_THRESHOLD_MS
+
+from .executors import wrap_execute
+
+logger = logging.getLogger('api.queries')
+
+PROJECT_PACKAGES = tuple(
+    str(settings.BASE_DIR / package) for package in ('api', 'receipts')
+)
+
+FINGERPRINT_SUBSTITUTIONS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+class QueryInspectionError(Exception):
+    pass
+
+
+def fingerprint(sql):
+    for pattern, replacement in FINGERPRINT_SUBSTITUTIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def caller():
+    for frame, lineno in traceback.walk_stack(None):
+        filename = frame.f_code.co_filename
+        if filename == __file__ or not filename.startswith(PROJECT_PACKAGES):
+            continue
+        name = frame.f_code.co_name
+        instance = frame.f_locals.get('self')
+        if instance is not None:
+            cls = type(instance)
+            name = f'{cls.__module__}.{cls.__qualname__}.{name}'
+        path = Path(filename).relative_to(settings.BASE_DIR)
+        return f'{path}:{lineno} in {name}'
+    return None
+
+
+class QueryLog:
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((
+                fingerprint(sql),
+                (perf_counter() - started) * 1000,
+                caller()
+            ))
+
+    def offenders(self):
+        repeated = defaultdict(list)
+        for statement, duration, frame in self.statements:
+            repeated[statement].append(frame)
+        return {
+            'n_plus_one': [
+                {
+                    'fingerprint': statement,
+                    'count': len(frames),
+                    'frames': sorted({frame for frame in frames if frame}),
+                }
+                for statement, frames in repeated.items()
+                if len(frames) >= N_PLUS_ONE_THRESHOLD
+            ],
+            'slow': [
+                {
+                    'fingerprint': statement,
+                    'duration_ms': round(duration, 1),
+                    'frame': frame,
+                }
+                for statement, duration, frame in self.statements
+                if duration >= SLOW_QUERY_THRESHOLD_MS
+            ],
+        }
+
+
+class QueryReport:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def add(self, endpoint, offenders):
+        with self._lock:
+            report = self.endpoints.setdefault(
+                endpoint, {'n_plus_one': {}, 'slow': {}}
+            )
+            for offender in offenders['n_plus_one']:
+                known = report['n_plus_one'].setdefault(
+                    offender['fingerprint'], offender
+                )
+                known['count'] = max(known['count'], offender['count'])
+            for offender in offenders['slow']:
+                known = report['slow'].setdefault(
+                    offender['fingerprint'], offender
+                )
+                known['duration_ms'] = max(
+                    known['duration_ms'], offender['duration_ms']
+                )
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    kind: sorted(
+                        offenders.values(),
+                        key=lambda offender: offender['fingerprint']
+                    )
+                    for kind, offenders in report.items()
+                }
+                for endpoint, report in sorted(self.endpoints.items())
+            }
+
+    def write(self, path):
+        Path(path).write_text(json.dumps(
+            self.as_dict(), ensure_ascii=False, indent=2
+        ))
+
+
+query_report = QueryReport()
+
+
+class QueryInspectionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.QUERY_INSPECTION not in ('warn', 'raise'):
+            raise MiddlewareNotUsed
+        if settings.QUERY_INSPECTION_REPORT:
+            atexit.register(
+                query_report.write, settings.QUERY_INSPECTION_REPORT
+            )
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        log = QueryLog()
+        with wrap_execute(log.execute):
+            response = self.get_response(request)
+        return self.inspect(request, response, log)
+
+    async def __acall__(self, request):
+        log = QueryLog()
+        with wrap_execute(log.execute):
+            response = await self.get_response(request)
+        return self.inspect(request, response, log)
+
+    def inspect(self, request, response, log):
+        offenders = log.offenders()
+        if not offenders['n_plus_one'] and not offenders['slow']:
+            return response
+        match = request.resolver_match
+        endpoint = (
+            f'{request.method} '
+            f'{match.view_name if match else request.path}'
+        )
+        query_report.add(endpoint, offenders)
+        message = f'{endpoint}: {json.dumps(offenders, ensure_ascii=False)}'
+        if settings.QUERY_INSPECTION == 'raise':
+            raise QueryInspectionError(message)
+        logger.warning(message)
+        return response
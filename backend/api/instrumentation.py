@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from receipts.constants import (
+    REQUEST_DURATION_BUCKETS,
+    REQUEST_QUERIES_BUCKETS
+)
+
+from .executors import wrap_execute
+
+logger = logging.getLogger('api.performance')
+
+PHASES = ('sql', 'serialize', 'render', 'total')
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self._depth = defaultdict(int)
+        self._render_started = None
+
+    @contextmanager
+    def measure(self, phase):
+        self._depth[phase] += 1
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[phase] -= 1
+            if not self._depth[phase]:
+                self.durations[phase] += perf_counter() - started
+
+    def execute(self, execute, sql, params, many, context):
+        self.queries += 1
+        with self.measure('sql'):
+            return execute(sql, params, many, context)
+
+    def render_started(self):
+        self._render_started = perf_counter()
+
+    def render_finished(self, response):
+        self.durations['render'] += perf_counter() - self._render_started
+
+
+def measure(phase):
+    timings = current_timings.get()
+    if timings is None:
+        return nullcontext()
+    return timings.measure(phase)
+
+
+class TimedSerializerMixin:
+
+    def to_representation(self, instance):
+        with measure('serialize'):
+            return super().to_representation(instance)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(
+            (*self.buckets, '+Inf'), self.counts
+        ):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class MetricsRegistry:
+    durations_name = 'foodgram_request_duration_seconds'
+    queries_name = 'foodgram_request_queries'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = {}
+        self.queries = {}
+
+    def observe(self, view, method, timings, total):
+        with self._lock:
+            for phase in PHASES:
+                key = (view, method, phase)
+                if key not in self.durations:
+                    self.durations[key] = Histogram(REQUEST_DURATION_BUCKETS)
+                self.durations[key].observe(
+                    total if phase == 'total' else timings.durations[phase]
+                )
+            key = (view, method)
+            if key not in self.queries:
+                self.queries[key] = Histogram(REQUEST_QUERIES_BUCKETS)
+            self.queries[key].observe(timings.queries)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.durations_name} Время обработки запроса по фазам.',
+            f'# TYPE {self.durations_name} histogram',
+        ]
+        with self._lock:
+            for (view, method, phase), histogram in sorted(
+                self.durations.items()
+            ):
+                lines.extend(histogram.samples(
+                    self.durations_name,
+                    f'view="{view}",method="{method}",phase="{phase}"'
+                ))
+            lines.extend([
+                f'# HELP {self.queries_name} Количество SQL-запросов.',
+                f'# TYPE {self.queries_name} histogram',
+            ])
+            for (view, method), histogram in sorted(self.queries.items()):
+                lines.extend(histogram.samples(
+                    self.queries_name, f'view="{view}",method="{method}"'
+                ))
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = perf_counter()
+        try:
+            with wrap_execute(timings.execute):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.report(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = perf_counter()
+        try:
+            with wrap_execute(timings.execute):
+                response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.report(request, response, timings, started)
+
+    def report(self, request, response, timings, started):
+        total = perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics_registry.observe(view, request.method, timings, total)
+        response['Server-Timing'] = ', '.join(
+            [f'sql;dur={timings.durations["sql"] * 1000:.1f};'
+             f'desc="{timings.queries}"']
+            + [f'{phase};dur={timings.durations[phase] * 1000:.1f}'
+               for phase in ('serialize', 'render')]
+            + [f'total;dur={total * 1000:.1f}']
+        )
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timings.queries,
+            **{
+                f'{phase}_ms': round(timings.durations[phase] * 1000, 1)
+                for phase in PHASES[:-1]
+            },
+            'total_ms': round(total * 1000, 1),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        timings = current_timings.get()
+        timings.render_started()
+        response.add_post_render_callback(timings.render_finished)
+        return response
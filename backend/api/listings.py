@@ -0,0 +1,160 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+
+from receipts.constants import RECEIPT_AUTHOR_FIELDS
+from receipts.models import (
+    Favourite,
+    IngredientInReceipt,
+    Receipt,
+    ShoppingCart,
+    Subscription
+)
+
+from .fieldsets import Fieldset
+
+User = get_user_model()
+
+RECEIPT_FIELDS = (
+    'id',
+    'tags',
+    'author',
+    'ingredients',
+    'is_favorited',
+    'is_in_shopping_cart',
+    'name',
+    'image',
+    'text',
+    'cooking_time',
+)
+RECEIPT_COLUMNS = ('name', 'image', 'text', 'cooking_time')
+AUTHOR_FIELDS = (
+    'username',
+    'first_name',
+    'last_name',
+    'id',
+    'email',
+    'is_subscribed',
+    'avatar',
+)
+TAG_FIELDS = ('id', 'name', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit', 'amount')
+
+
+def file_url(field, name, request):
+    if not name:
+        return None
+    url = field.storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def receipt_rows(queryset, fieldset=None):
+    fieldset = fieldset or Fieldset()
+    return queryset.values('id', 'author_id', *(
+        name for name in RECEIPT_COLUMNS if fieldset.includes(name)
+    ))
+
+
+def related_rows(queryset, receipt_ids, names, columns, ordering):
+    related = defaultdict(list)
+    if not names:
+        return related
+    for receipt_id, *values in queryset.filter(
+        receipt_id__in=receipt_ids
+    ).order_by(ordering).values_list('receipt_id', *columns):
+        related[receipt_id].append(dict(zip(names, values)))
+    return related
+
+
+def render_receipts(rows, request, fieldset=None):
+    fieldset = fieldset or Fieldset()
+    rows = list(rows)
+    receipt_ids = [row['id'] for row in rows]
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        user = None
+
+    tag_fields = [
+        name for name in TAG_FIELDS if fieldset.nested('tags').includes(name)
+    ]
+    tags = related_rows(
+        Receipt.tags.through.objects,
+        receipt_ids if fieldset.includes('tags') else [],
+        tag_fields,
+        [f'tag__{name}' for name in tag_fields],
+        'tag_id'
+    )
+    ingredient_fields = [
+        name for name in INGREDIENT_FIELDS
+        if fieldset.nested('ingredients').includes(name)
+    ]
+    ingredients = related_rows(
+        IngredientInReceipt.objects,
+        receipt_ids if fieldset.includes('ingredients') else [],
+        ingredient_fields,
+        [
+            name if name == 'amount' else f'ingredient__{name}'
+            for name in ingredient_fields
+        ],
+        'id'
+    )
+
+    def user_receipts(model, name):
+        if user is None or not fieldset.includes(name):
+            return frozenset()
+        return set(model.objects.filter(
+            user=user, receipt_id__in=receipt_ids
+        ).values_list('receipt_id', flat=True))
+
+    favourited = user_receipts(Favourite, 'is_favorited')
+    shopping_cart = user_receipts(ShoppingCart, 'is_in_shopping_cart')
+
+    authors = {}
+    if fieldset.includes('author'):
+        authors = render_authors(
+            {row['author_id'] for row in rows},
+            request,
+            user,
+            fieldset.nested('author')
+        )
+
+    image_field = Receipt._meta.get_field('image')
+    values = {
+        'tags': lambda row: tags[row['id']],
+        'author': lambda row: authors[row['author_id']],
+        'ingredients': lambda row: ingredients[row['id']],
+        'is_favorited': lambda row: row['id'] in favourited,
+        'is_in_shopping_cart': lambda row: row['id'] in shopping_cart,
+        'image': lambda row: file_url(image_field, row['image'], request),
+    }
+    fields = [name for name in RECEIPT_FIELDS if fieldset.includes(name)]
+    return [
+        {
+            name: values[name](row) if name in values else row[name]
+            for name in fields
+        }
+        for row in rows
+    ]
+
+
+def render_authors(author_ids, request, user, fieldset):
+    subscribed = frozenset()
+    if user is not None and fieldset.includes('is_subscribed'):
+        subscribed = set(Subscription.objects.filter(
+            follower=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+    avatar_field = User._meta.get_field('avatar')
+    fields = [name for name in AUTHOR_FIELDS if fieldset.includes(name)]
+    authors = {}
+    for author in User.objects.filter(id__in=author_ids).values('id', *(
+        name for name in RECEIPT_AUTHOR_FIELDS if fieldset.includes(name)
+    )):
+        author['is_subscribed'] = author['id'] in subscribed
+        if 'avatar' in author:
+            author['avatar'] = file_url(
+                avatar_field, author['avatar'], request
+            )
+        authors[author['id']] = {name: author[name] for name in fields}
+    return authors
@@ -0,0 +1,391 @@
+import asyncio
+import json
+import re
+from collections import Counter, defaultdict, namedtuple
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+
+from receipts.constants import (
+    LOADTEST_IDENTITY_VARIABLES,
+    LOADTEST_PERCENTILES
+)
+
+VARIABLE = re.compile(r'{{(\w+)}}')
+EXPECTED_STATUS = re.compile(r'должен быть (\d{3})')
+LOCAL_CAPTURE = re.compile(r'const (\w+) = _\.get\(responseData, "(\w+)"\)')
+SET_VARIABLE = re.compile(
+    r'pm\.collectionVariables\.set\([\'"](\w+)[\'"],\s*(.+?)\);?\s*$',
+    re.MULTILINE
+)
+RESPONSE_PATH = re.compile(
+    r'responseData((?:\[\d+\]|\.\w+)*?)(?:\.slice\((\d+),\s*(\d+)\))?'
+)
+PATH_STEP = re.compile(r'\[(\d+)\]|\.(\w+)')
+ID_SEGMENT = re.compile(r'/(?:{{\w+}}|\d+)(?=/)')
+RETRY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+RequestTemplate = namedtuple('RequestTemplate', (
+    'scenario', 'name', 'method', 'path', 'endpoint', 'authorization',
+    'body', 'expected', 'captures'
+))
+Capture = namedtuple('Capture', ('variable', 'steps', 'slice'))
+
+
+def script_source(item, listen):
+    return '\n'.join(
+        line
+        for event in item.get('event', ())
+        if event['listen'] == listen
+        for line in event['script']['exec']
+    )
+
+
+def parse_captures(source):
+    fields = dict(LOCAL_CAPTURE.findall(source))
+    captures = []
+    for variable, expression in SET_VARIABLE.findall(source):
+        if expression in fields:
+            captures.append(Capture(variable, (fields[expression],), None))
+            continue
+        match = RESPONSE_PATH.fullmatch(expression)
+        if match is None:
+            continue
+        captures.append(Capture(
+            variable,
+            tuple(
+                int(index) if index else key
+                for index, key in PATH_STEP.findall(match.group(1))
+            ),
+            (int(match.group(2)), int(match.group(3)))
+            if match.group(2) else None
+        ))
+    return tuple(captures)
+
+
+def authorization(auth, inherited):
+    if not auth:
+        return inherited
+    if auth['type'] != 'apikey':
+        return None
+    values = {entry['key']: entry['value'] for entry in auth['apikey']}
+    if values.get('key', 'Authorization') != 'Authorization':
+        return None
+    return values.get('value')
+
+
+def endpoint(method, path):
+    return f'{method} {ID_SEGMENT.sub("/{id}", path.partition("?")[0])}'
+
+
+def load_collection(path):
+    with open(path, encoding='utf-8') as file:
+        collection = json.load(file)
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', ())
+    }
+    templates = []
+
+    def walk(items, folders, inherited):
+        for item in items:
+            auth = authorization(item.get('auth'), inherited)
+            if 'item' in item:
+                walk(item['item'], folders + (item['name'],), auth)
+                continue
+            request = item['request']
+            url = request['url']
+            raw = url['raw'] if isinstance(url, dict) else url
+            path = raw.split('{{baseUrl}}', 1)[-1]
+            body = request.get('body') or {}
+            expected = EXPECTED_STATUS.search(script_source(item, 'test'))
+            templates.append(RequestTemplate(
+                scenario='/'.join(folders),
+                name=item['name'],
+                method=request['method'],
+                path=path,
+                endpoint=endpoint(request['method'], path),
+                authorization=authorization(request.get('auth'), auth),
+                body=body.get('raw', '') if body.get('mode') == 'raw' else '',
+                expected=int(expected.group(1)) if expected else None,
+                captures=parse_captures(script_source(item, 'test')),
+            ))
+
+    walk(collection['item'], (), authorization(collection.get('auth'), None))
+    return variables, templates
+
+
+def scenario_weight(scenario, weights):
+    matches = [
+        prefix for prefix in weights
+        if scenario == prefix or scenario.startswith(prefix + '/')
+    ]
+    return weights[max(matches, key=len)] if matches else 1
+
+
+def build_journey(templates, weights):
+    journey = []
+    scenario = []
+    for template in templates:
+        if scenario and scenario[0].scenario != template.scenario:
+            journey.extend(scenario * scenario_weight(
+                scenario[0].scenario, weights
+            ))
+            scenario = []
+        scenario.append(template)
+    if scenario:
+        journey.extend(
+            scenario * scenario_weight(scenario[0].scenario, weights)
+        )
+    return journey
+
+
+def personalize(variables, marker):
+    variables = dict(variables)
+    for name in LOADTEST_IDENTITY_VARIABLES:
+        if name not in variables:
+            continue
+        local, at, domain = json.loads(variables[name]).partition('@')
+        variables[name] = json.dumps(f'{local}.{marker}{at}{domain}')
+    return variables
+
+
+def render(template, variables):
+    return VARIABLE.sub(
+        lambda match: str(variables.get(match.group(1), match.group(0))),
+        template
+    )
+
+
+def capture(captures, body, variables):
+    if not captures:
+        return
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return
+    for variable, steps, bounds in captures:
+        value = data
+        try:
+            for step in steps:
+                value = value[step]
+        except (KeyError, IndexError, TypeError):
+            continue
+        if bounds is not None:
+            value = str(value)[bounds[0]:bounds[1]]
+        variables[variable] = value
+
+
+class Connection:
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers, body):
+        head = ''.join([
+            f'{method} {target} HTTP/1.1\r\n',
+            f'Host: {self.host}:{self.port}\r\n',
+            f'Content-Length: {len(body)}\r\n',
+            *(f'{name}: {value}\r\n' for name, value in headers.items()),
+            '\r\n',
+        ]).encode()
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        try:
+            self.writer.write(head + body)
+            await self.writer.drain()
+            status_line = await asyncio.wait_for(
+                self.reader.readline(), self.timeout
+            )
+            if not status_line:
+                raise ConnectionResetError
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused or method not in RETRY_METHODS:
+                raise
+            return await self.request(method, target, headers, body)
+        except BaseException:
+            self.close()
+            raise
+        try:
+            return await asyncio.wait_for(
+                self.read_response(method, status_line), self.timeout
+            )
+        except BaseException:
+            self.close()
+            raise
+
+    async def read_response(self, method, status_line):
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if method == 'HEAD' or status in (204, 304) or status < 200:
+            body = b''
+        elif 'chunked' in headers.get('transfer-encoding', ''):
+            body = await self.read_chunked()
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(
+                int(headers['content-length'])
+            )
+        else:
+            body = await self.reader.read()
+            self.close()
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    async def read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if not size:
+                await self.reader.readline()
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+
+async def replay(journey, variables, base_url, run_id, concurrency,
+                 duration=None, iterations=None, timeout=30):
+    location = urlsplit(base_url)
+    prefix = location.path.rstrip('/')
+    samples = defaultdict(list)
+    deadline = None if duration is None else perf_counter() + duration
+
+    def finished(iteration):
+        if deadline is not None:
+            return perf_counter() >= deadline
+        return iteration >= iterations
+
+    async def virtual_user(number):
+        connection = Connection(
+            location.hostname, location.port or 80, timeout
+        )
+        iteration = 0
+        try:
+            while not finished(iteration):
+                state = personalize(
+                    variables, f'{run_id}-{number}-{iteration}'
+                )
+                for template in journey:
+                    if deadline is not None and perf_counter() >= deadline:
+                        break
+                    await execute(connection, template, state)
+                iteration += 1
+        finally:
+            connection.close()
+
+    async def execute(connection, template, state):
+        headers = {'Content-Type': 'application/json'}
+        if template.authorization:
+            headers['Authorization'] = render(template.authorization, state)
+        target = quote(prefix + render(template.path, state), safe='/?&=%')
+        started = perf_counter()
+        try:
+            status, body = await connection.request(
+                template.method, target, headers,
+                render(template.body, state).encode()
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ValueError, IndexError):
+            samples[template.endpoint].append(
+                (perf_counter() - started, None, False)
+            )
+            return
+        samples[template.endpoint].append((
+            perf_counter() - started,
+            status,
+            template.expected is None and status < 500
+            or status == template.expected
+        ))
+        if status < 400:
+            capture(template.captures, body, state)
+
+    started = perf_counter()
+    await asyncio.gather(*(
+        virtual_user(number) for number in range(concurrency)
+    ))
+    return samples, perf_counter() - started
+
+
+def percentile(timings, share):
+    return timings[min(int(len(timings) * share), len(timings) - 1)]
+
+
+def statistics(entries, elapsed):
+    timings = sorted(duration for duration, *_ in entries)
+    errors = sum(not ok for *_, ok in entries)
+    return {
+        'requests': len(entries),
+        'throughput': round(len(entries) / elapsed, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(entries), 4),
+        'statuses': dict(sorted(Counter(
+            str(status or 'network') for _, status, _ in entries
+        ).items())),
+        'latency_ms': {
+            'mean': round(sum(timings) / len(timings) * 1000, 2),
+            **{
+                f'p{round(share * 100)}': round(
+                    percentile(timings, share) * 1000, 2
+                )
+                for share in LOADTEST_PERCENTILES
+            },
+            'max': round(timings[-1] * 1000, 2),
+        },
+    }
+
+
+def change(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def summarize(samples, elapsed, meta, baseline=None):
+    report = {
+        'meta': {**meta, 'elapsed': round(elapsed, 2)},
+        'total': statistics(
+            [entry for entries in samples.values() for entry in entries],
+            elapsed
+        ),
+        'endpoints': {
+            key: statistics(entries, elapsed)
+            for key, entries in sorted(samples.items())
+        },
+    }
+    if baseline is None:
+        return report
+    report['baseline'] = baseline['meta']
+    previous = {'total': baseline['total'], **baseline['endpoints']}
+    for key, current in (('total', report['total']),
+                         *report['endpoints'].items()):
+        if key not in previous:
+            continue
+        current['change'] = {
+            'throughput': change(
+                current['throughput'], previous[key]['throughput']
+            ),
+            'p95': change(
+                current['latency_ms']['p95'],
+                previous[key]['latency_ms']['p95']
+            ),
+            'error_rate': round(
+                current['error_rate'] - previous[key]['error_rate'], 4
+            ),
+        }
+    return report
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from backend.postgresql_pool.base import pools
+
+ENGINES = {
+    'без пула': 'django.db.backends.postgresql',
+    'с пулом': 'backend.postgresql_pool',
+}
+
+
+def request_cycle(backend, settings_dict, queries):
+    connection = backend.DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+    started = perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+    finally:
+        connection.close()
+    return perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время «запроса» (соединение, SELECT 1, закрытие) '
+            'к PostgreSQL со стандартным бэкендом и с пулом соединений.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--queries', type=int, default=1)
+
+    def handle(self, *args, **options):
+        settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+        if connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            raise CommandError('Нужна база PostgreSQL.')
+        connections[DEFAULT_DB_ALIAS].ensure_connection()
+        connections[DEFAULT_DB_ALIAS].close()
+        for name, engine in ENGINES.items():
+            backend = load_backend(engine)
+            started = perf_counter()
+            with ThreadPoolExecutor(options['threads']) as executor:
+                timings = sorted(executor.map(
+                    lambda _: request_cycle(
+                        backend,
+                        {**settings_dict, 'ENGINE': engine},
+                        options['queries']
+                    ),
+                    range(options['requests'])
+                ))
+            elapsed = perf_counter() - started
+            self.stdout.write(
+                f'{name:<10} {options["requests"] / elapsed:>8.0f} запр/с '
+                f'p50 {timings[len(timings) // 2] * 1000:>6.2f} мс '
+                f'p99 {timings[int(len(timings) * 0.99)] * 1000:>6.2f} мс'
+            )
+            if engine == 'backend.postgresql_pool':
+                self.stdout.write(
+                    f'{"":<10} {pools[DEFAULT_DB_ALIAS].metrics()}'
+                )
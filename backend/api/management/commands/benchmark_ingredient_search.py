@@ -0,0 +1,103 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.filters import IngredientFilter
+from api.search import ingredient_index
+from receipts.models import Ingredient
+
+from .benchmark_servers import percentile
+
+
+def typo(name, pick):
+    if len(name) < 4:
+        return name
+    position = pick.randrange(1, len(name) - 1)
+    return name[:position] + name[position + 1:]
+
+
+def make_queries(names, count, pick):
+    queries = []
+    for _ in range(count):
+        name = pick.choice(names).lower()
+        queries.append(
+            typo(name, pick) if pick.random() < 0.5
+            else name[:pick.randint(2, max(len(name), 2))]
+        )
+    return queries
+
+
+def synthetic(names, count, pick):
+    words = sorted({word for name in names for word in name.split()})
+    for number in range(count):
+        yield Ingredient(
+            name=f'{pick.choice(names)} {pick.choice(words)} {number}'[:128],
+            measurement_unit='г'
+        )
+
+
+class Command(BaseCommand):
+    help = ('Измеряет скорость нечеткого поиска продуктов на текущем '
+            'каталоге и на синтетическом каталоге заданного размера. '
+            'Синтетические продукты создаются в транзакции, которая '
+            'откатывается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic-size', type=int, default=200000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError('Нет продуктов для поиска.')
+        pick = random.Random(options['seed'])
+        queries = make_queries(names, options['queries'], pick)
+        try:
+            self.measure(f'каталог {len(names)}', queries)
+            missing = options['synthetic_size'] - len(names)
+            if missing <= 0:
+                return
+            with transaction.atomic():
+                Ingredient.objects.bulk_create(
+                    synthetic(names, missing, pick), batch_size=5000
+                )
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE receipts_ingredient')
+                self.measure(
+                    f'синтетика {options["synthetic_size"]}', queries
+                )
+                transaction.set_rollback(True)
+        finally:
+            ingredient_index.invalidate()
+
+    def search(self, query, fuzzy):
+        return list(IngredientFilter(
+            {'name': query, 'fuzzy': fuzzy},
+            queryset=Ingredient.objects.all()
+        ).qs.values_list('id', flat=True))
+
+    def measure(self, label, queries):
+        ingredient_index.invalidate()
+        started = perf_counter()
+        self.search(queries[0], True)
+        self.stdout.write(
+            f'{label}: первый запрос с построением индекса '
+            f'{(perf_counter() - started) * 1000:.1f} мс'
+        )
+        for fuzzy, title in ((False, 'префикс'), (True, 'нечеткий')):
+            timings = []
+            for query in queries:
+                started = perf_counter()
+                self.search(query, fuzzy)
+                timings.append(perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f'{"":<4}{title:<10} '
+                f'p50 {percentile(timings, 0.5) * 1000:>8.2f} мс '
+                f'p95 {percentile(timings, 0.95) * 1000:>8.2f} мс '
+                f'p99 {percentile(timings, 0.99) * 1000:>8.2f} мс'
+            )
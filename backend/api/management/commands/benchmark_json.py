@@ -0,0 +1,74 @@
+import base64
+import io
+import os
+from functools import partial
+from itertools import cycle, islice
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.serializers import ReceiptSerializer
+from receipts.models import Receipt
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        result = function()
+        timings.append(perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость стандартных и orjson рендерера и парсера '
+            'на странице рецептов и на загрузке base64-картинки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--upload-mb', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        recipes = list(Receipt.objects.all()[:options['page_size']])
+        if not recipes:
+            raise CommandError('Нет рецептов для проверки.')
+        page = ReceiptSerializer(
+            list(islice(cycle(recipes), options['page_size'])),
+            many=True,
+            context={'request': None}
+        ).data
+        image = base64.b64encode(
+            os.urandom(options['upload_mb'] * 1024 * 1024 * 3 // 4)
+        ).decode()
+        upload = JSONRenderer().render({
+            'name': 'Рецепт',
+            'image': f'data:image/png;base64,{image}',
+        })
+        self.report(
+            f'рендер {options["page_size"]} рецептов',
+            options['repeat'],
+            partial(JSONRenderer().render, page),
+            partial(ORJSONRenderer().render, page)
+        )
+        self.report(
+            f'разбор загрузки {len(upload) / 1024 / 1024:.1f} МБ',
+            options['repeat'],
+            lambda: JSONParser().parse(io.BytesIO(upload)),
+            lambda: ORJSONParser().parse(io.BytesIO(upload))
+        )
+
+    def report(self, name, repeat, baseline, candidate):
+        baseline_time, expected = best_of(repeat, baseline)
+        candidate_time, result = best_of(repeat, candidate)
+        if result != expected:
+            raise CommandError(f'{name}: результаты различаются.')
+        self.stdout.write(
+            f'{name:<32} json {baseline_time * 1000:>8.2f} мс '
+            f'orjson {candidate_time * 1000:>8.2f} мс '
+            f'x{baseline_time / candidate_time:.1f}'
+        )
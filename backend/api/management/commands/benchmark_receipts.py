@@ -0,0 +1,118 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.listings import receipt_rows, render_receipts
+from api.renderers import ORJSONRenderer
+from api.serializers import ReceiptSerializer
+from receipts.models import IngredientInReceipt, Receipt
+
+User = get_user_model()
+
+
+def fill_receipts(count):
+    templates = list(Receipt.objects.prefetch_related(
+        'tags', 'ingredients_in_receipts'
+    ))
+    for number in range(count):
+        template = templates[number % len(templates)]
+        receipt = Receipt.objects.create(
+            author_id=template.author_id,
+            name=f'{template.name[:100]} {number}',
+            image=template.image.name,
+            text=template.text,
+            cooking_time=template.cooking_time
+        )
+        receipt.tags.set(template.tags.all())
+        IngredientInReceipt.objects.bulk_create(
+            IngredientInReceipt(
+                receipt=receipt,
+                ingredient_id=item.ingredient_id,
+                amount=item.amount
+            )
+            for item in template.ingredients_in_receipts.all()
+        )
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = ('Проверяет, что быстрый рендеринг списка рецептов совпадает '
+            'с ReceiptSerializer байт в байт, и сравнивает их скорость.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        if not Receipt.objects.exists():
+            raise CommandError('Нет рецептов для проверки.')
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            missing = page_size - Receipt.objects.count()
+            if missing > 0:
+                fill_receipts(missing)
+            for user in (AnonymousUser(), User.objects.first()):
+                self.compare(user, page_size, options['repeat'])
+            transaction.set_rollback(True)
+
+    def compare(self, user, page_size, repeat):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        renderer = ORJSONRenderer()
+        queryset = Receipt.objects.order_by('-published_at', '-id')
+        pages = [
+            list(queryset.values_list('id', flat=True)[
+                offset:offset + page_size
+            ])
+            for offset in range(0, queryset.count(), page_size)
+        ]
+
+        def serializer_page(ids):
+            return ReceiptSerializer(
+                queryset.filter(id__in=ids).select_related(
+                    'author'
+                ).prefetch_related(
+                    'tags', 'ingredients_in_receipts__ingredient'
+                ),
+                many=True,
+                context={'request': request}
+            ).data
+
+        def fast_page(ids):
+            return render_receipts(
+                receipt_rows(queryset.filter(id__in=ids)), request
+            )
+
+        for ids in pages:
+            if (
+                renderer.render(serializer_page(ids))
+                != renderer.render(fast_page(ids))
+            ):
+                raise CommandError(
+                    f'Вывод для {user} расходится с ReceiptSerializer.'
+                )
+        baseline = best_of(repeat, lambda: serializer_page(pages[0]))
+        fast = best_of(repeat, lambda: fast_page(pages[0]))
+        self.stdout.write(
+            f'{str(user):<16} {len(pages[0])} рецептов: '
+            f'ReceiptSerializer {baseline * 1000:>8.2f} мс, '
+            f'render_receipts {fast * 1000:>8.2f} мс, '
+            f'x{baseline / fast:.1f}'
+        )
@@ -0,0 +1,179 @@
+import os
+import random
+import signal
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from receipts.models import Receipt
+
+User = get_user_model()
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+
+def scenario(receipt_id):
+    return [
+        (reverse('recipes-list'), False, 5),
+        (reverse('recipes-detail', kwargs={'pk': receipt_id}), False, 3),
+        (reverse('tags-list'), False, 2),
+        (reverse('ingredients-list') + '?name=а', False, 2),
+        (reverse('recipes-list') + '?is_favorited=1', True, 1),
+        (reverse('recipes-download-shopping-cart'), True, 1),
+    ]
+
+
+@contextmanager
+def gunicorn(worker_class, options):
+    process = subprocess.Popen(
+        ['gunicorn', '--config', 'gunicorn.conf.py'],
+        cwd=settings.BASE_DIR,
+        env={
+            **os.environ,
+            'GUNICORN_BIND': f'127.0.0.1:{options["port"]}',
+            'GUNICORN_WORKER_CLASS': worker_class,
+            'GUNICORN_WORKERS': str(options['workers']),
+            'GUNICORN_THREADS': str(options['threads']),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=None if options['verbosity'] > 1 else subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{options["port"]}'
+    try:
+        wait_ready(process, base_url)
+        yield base_url
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def wait_ready(process, base_url):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('gunicorn завершился при запуске.')
+        try:
+            requests.get(base_url + reverse('tags-list'), timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise CommandError('gunicorn не ответил за 60 с.')
+
+
+def percentile(timings, share):
+    return timings[min(int(len(timings) * share), len(timings) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Запускает gunicorn с разными классами воркеров и нагружает '
+            'основные эндпоинты API, сравнивая пропускную способность '
+            'и задержки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--worker-classes',
+            default=','.join(WORKER_CLASSES),
+            help='Через запятую: ' + ', '.join(WORKER_CLASSES)
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--warmup', type=float, default=2)
+        parser.add_argument('--port', type=int, default=8060)
+
+    def handle(self, *args, **options):
+        names = options['worker_classes'].split(',')
+        unknown = set(names) - set(WORKER_CLASSES)
+        if unknown:
+            raise CommandError(
+                'Неизвестные классы воркеров: ' + ', '.join(unknown)
+            )
+        user = User.objects.order_by('id').first()
+        receipt = Receipt.objects.order_by('id').first()
+        if user is None or receipt is None:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт.')
+        token, _ = Token.objects.get_or_create(user=user)
+        endpoints = scenario(receipt.id)
+        for name in names:
+            with gunicorn(WORKER_CLASSES[name], options) as base_url:
+                self.load(base_url, endpoints, token.key, options['warmup'],
+                          options['concurrency'])
+                results = self.load(
+                    base_url, endpoints, token.key, options['duration'],
+                    options['concurrency']
+                )
+            self.report(
+                name, results, options['duration'], options['verbosity']
+            )
+
+    def load(self, base_url, endpoints, token, duration, concurrency):
+        deadline = perf_counter() + duration
+        weights = [weight for *_, weight in endpoints]
+
+        def client(number):
+            session = requests.Session()
+            pick = random.Random(number)
+            timings = defaultdict(list)
+            errors = 0
+            while perf_counter() < deadline:
+                url, authenticated, _ = pick.choices(endpoints, weights)[0]
+                started = perf_counter()
+                try:
+                    response = session.get(
+                        base_url + url,
+                        headers=(
+                            {'Authorization': f'Token {token}'}
+                            if authenticated else {}
+                        ),
+                        timeout=30,
+                    )
+                    errors += response.status_code >= 400
+                except requests.RequestException:
+                    errors += 1
+                timings[url].append(perf_counter() - started)
+            return timings, errors
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(client, range(concurrency)))
+
+    def report(self, name, results, duration, verbosity):
+        timings = defaultdict(list)
+        errors = 0
+        for client_timings, client_errors in results:
+            errors += client_errors
+            for url, values in client_timings.items():
+                timings[url].extend(values)
+        overall = sorted(value for values in timings.values()
+                         for value in values)
+        if not overall:
+            raise CommandError(f'{name}: ни один запрос не выполнен.')
+        self.stdout.write(
+            f'{name:<8} {len(overall) / duration:>8.1f} запр/с '
+            f'p50 {percentile(overall, 0.5) * 1000:>7.1f} мс '
+            f'p95 {percentile(overall, 0.95) * 1000:>7.1f} мс '
+            f'p99 {percentile(overall, 0.99) * 1000:>7.1f} мс '
+            f'ошибок {errors}'
+        )
+        if verbosity > 1:
+            for url, values in sorted(timings.items()):
+                values.sort()
+                self.stdout.write(
+                    f'{"":<8} {url:<48} {len(values):>6} '
+                    f'p50 {percentile(values, 0.5) * 1000:>7.1f} мс '
+                    f'p99 {percentile(values, 0.99) * 1000:>7.1f} мс'
+                )
@@ -0,0 +1,179 @@
+import asyncio
+import base64
+import json
+import os
+from collections import defaultdict
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .benchmark_servers import gunicorn, percentile
+from receipts.models import Receipt
+
+User = get_user_model()
+
+DEPLOYMENTS = {
+    'wsgi': 'gthread',
+    'asgi': 'uvicorn.workers.UvicornWorker',
+}
+
+
+async def http(port, method, path, headers=None, body=b'', chunks=1,
+               pause=0):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(''.join([
+            f'{method} {path} HTTP/1.1\r\n',
+            'Host: 127.0.0.1\r\n',
+            'Connection: close\r\n',
+            f'Content-Length: {len(body)}\r\n',
+            *(f'{name}: {value}\r\n'
+              for name, value in (headers or {}).items()),
+            '\r\n',
+        ]).encode())
+        size = -(-len(body) // chunks) if body else 0
+        for offset in range(0, len(body), size or 1):
+            writer.write(body[offset:offset + size])
+            await writer.drain()
+            await asyncio.sleep(pause)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        await reader.read()
+        return status
+    finally:
+        writer.close()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI (gthread) и ASGI (uvicorn) развертывания: '
+            'медленные клиенты загружают аватар по частям, а быстрые '
+            'клиенты измеряют задержку остальных запросов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--deployments',
+            default=','.join(DEPLOYMENTS),
+            help='Через запятую: ' + ', '.join(DEPLOYMENTS)
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--slow-clients', type=int, default=16)
+        parser.add_argument('--fast-clients', type=int, default=8)
+        parser.add_argument('--upload-size', type=int, default=64 * 1024)
+        parser.add_argument(
+            '--trickle',
+            type=float,
+            default=5,
+            help='За сколько секунд медленный клиент отправляет тело.'
+        )
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--port', type=int, default=8060)
+
+    def handle(self, *args, **options):
+        names = options['deployments'].split(',')
+        unknown = set(names) - set(DEPLOYMENTS)
+        if unknown:
+            raise CommandError(
+                'Неизвестные развертывания: ' + ', '.join(unknown)
+            )
+        user = User.objects.order_by('id').first()
+        receipt = Receipt.objects.order_by('id').first()
+        if user is None or receipt is None:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт.')
+        token, _ = Token.objects.get_or_create(user=user)
+        fast_urls = [
+            reverse('tags-list'),
+            reverse('receipt-short-link', kwargs={'receipt_id': receipt.id}),
+            reverse('recipes-list'),
+        ]
+        upload = json.dumps({'avatar': 'data:image/png;base64,' + (
+            base64.b64encode(os.urandom(options['upload_size'])).decode()
+        )}).encode()
+        for name in names:
+            with gunicorn(DEPLOYMENTS[name], options):
+                timings, slow = asyncio.run(self.load(
+                    options, fast_urls, reverse('avatar'), upload, token.key
+                ))
+            self.report(name, timings, slow, options)
+
+    async def load(self, options, fast_urls, upload_url, upload, token):
+        port = options['port']
+        timings = defaultdict(list)
+        slow = {'completed': 0, 'errors': 0}
+        stopped = asyncio.Event()
+
+        async def slow_client():
+            while not stopped.is_set():
+                try:
+                    await http(
+                        port, 'PUT', upload_url,
+                        {
+                            'Authorization': f'Token {token}',
+                            'Content-Type': 'application/json',
+                        },
+                        upload, chunks=32, pause=options['trickle'] / 32
+                    )
+                    slow['completed'] += 1
+                except (OSError, ValueError, IndexError):
+                    slow['errors'] += 1
+
+        async def fast_client(number):
+            while not stopped.is_set():
+                url = fast_urls[number % len(fast_urls)]
+                number += 1
+                started = perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        http(port, 'GET', url), options['trickle'] * 4
+                    )
+                except (OSError, ValueError, IndexError,
+                        asyncio.TimeoutError):
+                    status = None
+                timings[url].append((perf_counter() - started, status))
+
+        slow_clients = [
+            asyncio.ensure_future(slow_client())
+            for _ in range(options['slow_clients'])
+        ]
+        await asyncio.sleep(1)
+        fast_clients = [
+            asyncio.ensure_future(fast_client(number))
+            for number in range(options['fast_clients'])
+        ]
+        await asyncio.sleep(options['duration'])
+        stopped.set()
+        await asyncio.gather(*fast_clients)
+        for client in slow_clients:
+            client.cancel()
+        await asyncio.gather(*slow_clients, return_exceptions=True)
+        return timings, slow
+
+    def report(self, name, timings, slow, options):
+        overall = sorted(
+            duration for values in timings.values()
+            for duration, _ in values
+        )
+        if not overall:
+            raise CommandError(f'{name}: ни один запрос не выполнен.')
+        errors = sum(
+            status is None or status >= 500
+            for values in timings.values() for _, status in values
+        )
+        self.stdout.write(
+            f'{name:<5} быстрые: {len(overall) / options["duration"]:>7.1f} '
+            f'запр/с p50 {percentile(overall, 0.5) * 1000:>7.1f} мс '
+            f'p99 {percentile(overall, 0.99) * 1000:>7.1f} мс '
+            f'ошибок {errors}; медленные загрузки: {slow["completed"]} '
+            f'(ошибок {slow["errors"]})'
+        )
+        if options['verbosity'] > 1:
+            for url, values in sorted(timings.items()):
+                durations = sorted(duration for duration, _ in values)
+                self.stdout.write(
+                    f'{"":<5} {url:<40} {len(durations):>6} '
+                    f'p50 {percentile(durations, 0.5) * 1000:>7.1f} мс '
+                    f'p99 {percentile(durations, 0.99) * 1000:>7.1f} мс'
+                )
@@ -0,0 +1,78 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.inspection import query_report
+from receipts.models import Receipt
+
+User = get_user_model()
+
+
+def representative_urls(user_id, receipt_id):
+    return [
+        reverse('recipes-list'),
+        reverse('recipes-detail', kwargs={'pk': receipt_id}),
+        reverse('recipes-list') + '?is_favorited=1',
+        reverse('recipes-list') + '?is_in_shopping_cart=1',
+        reverse('recipes-download-shopping-cart'),
+        reverse('tags-list'),
+        reverse('ingredients-list') + '?name=а',
+        reverse('users-list'),
+        reverse('users-detail', kwargs={'id': user_id}),
+        reverse('users-subscriptions'),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Запрашивает основные эндпоинты API и выводит отчет '
+            'о повторяющихся (N+1) и медленных SQL-запросах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON-отчета.'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемные запросы.'
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('id').first()
+        receipt = Receipt.objects.order_by('id').first()
+        if user is None or receipt is None:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт.')
+        failed = []
+        with override_settings(
+            QUERY_INSPECTION='warn',
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            client = APIClient()
+            client.force_authenticate(user)
+            for url in representative_urls(user.id, receipt.id):
+                status = client.get(url).status_code
+                if not 200 <= status < 300:
+                    failed.append(f'{url} ({status})')
+        if failed:
+            raise CommandError(
+                'Эндпоинты ответили ошибкой: ' + ', '.join(failed)
+            )
+        report = json.dumps(
+            query_report.as_dict(), ensure_ascii=False, indent=2
+        )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
+        if options['strict'] and query_report.endpoints:
+            raise CommandError(
+                'Найдены проблемные запросы: '
+                + ', '.join(query_report.endpoints)
+            )
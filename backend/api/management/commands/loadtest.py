@@ -0,0 +1,225 @@
+import asyncio
+import json
+import random
+import secrets
+from contextlib import ExitStack
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.utils import timezone
+from PIL import Image
+
+from .benchmark_servers import WORKER_CLASSES, gunicorn
+from api.loadtest import build_journey, load_collection, replay, summarize
+from receipts.constants import LOADTEST_SCENARIO_WEIGHTS
+from receipts.models import Ingredient, IngredientInReceipt, Receipt, Tag
+
+User = get_user_model()
+
+COLLECTION = (
+    settings.BASE_DIR.parent / 'postman_collection'
+    / 'foodgram.postman_collection.json'
+)
+MIN_TAGS = 3
+MIN_INGREDIENTS = 2
+
+
+def parse_weight(value):
+    scenario, _, weight = value.rpartition('=')
+    if not scenario or not weight.isdigit():
+        raise ValueError(value)
+    return scenario, int(weight)
+
+
+def seed(run_id, count):
+    for number in range(Tag.objects.count(), MIN_TAGS):
+        Tag.objects.create(
+            name=f'Тег {run_id} {number}', slug=f'{run_id}-{number}'
+        )
+    for number in range(Ingredient.objects.count(), MIN_INGREDIENTS):
+        Ingredient.objects.create(
+            name=f'продукт {run_id} {number}', measurement_unit='г'
+        )
+    if not count:
+        return
+    image = BytesIO()
+    Image.new('RGB', (1, 1)).save(image, 'PNG')
+    image = default_storage.save(
+        f'receipts/{run_id}.png', ContentFile(image.getvalue())
+    )
+    authors = [
+        User.objects.create_user(
+            username=f'{run_id}-author-{number}',
+            email=f'{run_id}-author-{number}@example.com',
+            first_name='Автор',
+            last_name=str(number),
+        )
+        for number in range(max(count // 10, 1))
+    ]
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    pick = random.Random(run_id)
+    for number in range(count):
+        receipt = Receipt.objects.create(
+            author=pick.choice(authors),
+            name=f'Рецепт {number}',
+            image=image,
+            text='Синтетический рецепт для нагрузочного теста.',
+            cooking_time=pick.randint(1, 180),
+        )
+        receipt.tags.set(pick.sample(tag_ids, pick.randint(1, 3)))
+        IngredientInReceipt.objects.bulk_create(
+            IngredientInReceipt(
+                receipt=receipt,
+                ingredient_id=ingredient_id,
+                amount=pick.randint(1, 500),
+            )
+            for ingredient_id in pick.sample(
+                ingredient_ids, min(pick.randint(2, 8), len(ingredient_ids))
+            )
+        )
+
+
+def cleanup(run_id):
+    users = User.objects.filter(username__contains=run_id)
+    files = [
+        *Receipt.objects.filter(author__in=users).values_list(
+            'image', flat=True
+        ),
+        *users.exclude(avatar='').values_list('avatar', flat=True),
+        f'receipts/{run_id}.png',
+    ]
+    deleted, _ = users.delete()
+    Tag.objects.filter(slug__startswith=run_id).delete()
+    Ingredient.objects.filter(name__contains=run_id).delete()
+    for name in set(files):
+        if name and default_storage.exists(name):
+            default_storage.delete(name)
+    return deleted
+
+
+class Command(BaseCommand):
+    help = ('Воспроизводит postman-коллекцию как нагрузочный тест: каждый '
+            'виртуальный пользователь проходит коллекцию со своими '
+            'учетными данными, папки повторяются согласно весам. '
+            'Сохраняет отчет в JSON и HTML с пропускной способностью, '
+            'перцентилями задержек и долей ошибок по эндпоинтам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=str(COLLECTION))
+        parser.add_argument(
+            '--base-url',
+            help='Адрес уже запущенного сервера с той же базой данных. '
+                 'Без него запускается gunicorn.'
+        )
+        parser.add_argument(
+            '--worker-class', default='gthread', choices=WORKER_CLASSES
+        )
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--port', type=int, default=8060)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument(
+            '--iterations', type=int,
+            help='Число проходов коллекции на пользователя вместо --duration.'
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument(
+            '--weight', type=parse_weight, action='append', default=[],
+            help='Вес папки коллекции: recipes/get_recipes=10.'
+        )
+        parser.add_argument('--seed-recipes', type=int, default=100)
+        parser.add_argument('--keep', action='store_true')
+        parser.add_argument(
+            '--output',
+            help='Путь к отчету без расширения, по умолчанию '
+                 'loadtest-<время запуска>.'
+        )
+        parser.add_argument('--baseline', help='JSON-отчет для сравнения.')
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        run_id = f'lt{secrets.token_hex(3)}'
+        variables, templates = load_collection(options['collection'])
+        weights = {**LOADTEST_SCENARIO_WEIGHTS, **dict(options['weight'])}
+        scenarios = {template.scenario for template in templates}
+        unknown = [
+            prefix for prefix in weights
+            if not any(scenario == prefix or scenario.startswith(prefix + '/')
+                       for scenario in scenarios)
+        ]
+        if unknown:
+            raise CommandError(
+                'Нет таких папок в коллекции: ' + ', '.join(unknown)
+            )
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+        journey = build_journey(templates, weights)
+        seed(run_id, options['seed_recipes'])
+        try:
+            with ExitStack() as stack:
+                base_url = options['base_url'] or stack.enter_context(
+                    gunicorn(WORKER_CLASSES[options['worker_class']], options)
+                )
+                samples, elapsed = asyncio.run(replay(
+                    journey, variables, base_url, run_id,
+                    options['concurrency'],
+                    duration=(None if options['iterations']
+                              else options['duration']),
+                    iterations=options['iterations'],
+                    timeout=options['timeout'],
+                ))
+        finally:
+            if not options['keep']:
+                cleanup(run_id)
+        if not samples:
+            raise CommandError('Ни один запрос не выполнен.')
+        report = summarize(samples, elapsed, {
+            'run_id': run_id,
+            'started_at': started_at.isoformat(),
+            'collection': options['collection'],
+            'server': options['base_url'] or options['worker_class'],
+            'workers': None if options['base_url'] else options['workers'],
+            'threads': None if options['base_url'] else options['threads'],
+            'concurrency': options['concurrency'],
+            'duration': None if options['iterations'] else options['duration'],
+            'iterations': options['iterations'],
+            'seed_recipes': options['seed_recipes'],
+            'weights': weights,
+        }, baseline)
+        output = options['output'] or (
+            f'loadtest-{started_at:%Y%m%d-%H%M%S}'
+        )
+        with open(f'{output}.json', 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        with open(f'{output}.html', 'w', encoding='utf-8') as file:
+            file.write(render_to_string('api/loadtest_report.html', report))
+        self.write_summary(report)
+        self.stdout.write(f'Отчет: {output}.json, {output}.html')
+
+    def write_summary(self, report):
+        for key, stats in (('Всего', report['total']),
+                           *report['endpoints'].items()):
+            latency = stats['latency_ms']
+            line = (
+                f'{key:<52} {stats["requests"]:>7} '
+                f'{stats["throughput"]:>8.1f} запр/с '
+                f'p50 {latency["p50"]:>7.1f} мс '
+                f'p95 {latency["p95"]:>7.1f} мс '
+                f'p99 {latency["p99"]:>7.1f} мс '
+                f'ошибок {stats["error_rate"]:>6.1%}'
+            )
+            if stats.get('change'):
+                line += (
+                    f' Δ запр/с {stats["change"]["throughput"]}% '
+                    f'Δ p95 {stats["change"]["p95"]}%'
+                )
+            self.stdout.write(line)
@@ -1,3 +1,6 @@
+from hmac import compare_digest
+
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -8,3 +11,16 @@ class IsAuthorOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
             request.method in permissions.SAFE_METHODS
             or receipt.author == request.user
         )
+
+
+class MetricsPermission(permissions.IsAdminUser):
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return (
+            request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+            or bool(token) and compare_digest(
+                request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+            )
+            or super().has_permission(request, view)
+        )
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from receipts.constants import PRIMARY_PIN_CACHE_KEY, PRIMARY_PIN_COOKIE
+
+read_database = ContextVar('read_database', default=DEFAULT_DB_ALIAS)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def pin_cache_key(authorization):
+    if not authorization:
+        return None
+    return PRIMARY_PIN_CACHE_KEY.format(
+        hashlib.sha256(authorization.encode()).hexdigest()
+    )
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.replicas = replica_aliases()
+        if not self.replicas:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        key, token = self.route(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                read_database.reset(token)
+        return self.finish(request, response, key)
+
+    async def __acall__(self, request):
+        key, token = self.route(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                read_database.reset(token)
+        return self.finish(request, response, key)
+
+    def route(self, request):
+        key = pin_cache_key(request.META.get('HTTP_AUTHORIZATION'))
+        if request.method not in SAFE_METHODS or self.pinned(request, key):
+            return key, None
+        return key, read_database.set(random.choice(self.replicas))
+
+    def finish(self, request, response, key):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(response, key)
+        return response
+
+    def pinned(self, request, key):
+        return (
+            PRIMARY_PIN_COOKIE in request.COOKIES
+            or key is not None and cache.get(key, False)
+        )
+
+    def pin(self, response, key):
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            '1',
+            max_age=settings.PRIMARY_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+        if key is not None:
+            cache.set(key, True, settings.PRIMARY_PIN_SECONDS)
@@ -0,0 +1,60 @@
+import heapq
+import re
+from collections import Counter, defaultdict, namedtuple
+
+from receipts.constants import TRIGRAM_SIMILARITY_THRESHOLD
+from receipts.models import Ingredient
+
+from .indexes import InMemoryIndex
+
+WORD_PATTERN = re.compile(r'\w+')
+
+TrigramSnapshot = namedtuple('TrigramSnapshot', ('names', 'sizes', 'postings'))
+
+
+def trigrams(text):
+    grams = set()
+    for word in WORD_PATTERN.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex(InMemoryIndex):
+
+    def __init__(self):
+        super().__init__()
+        self.snapshot = TrigramSnapshot({}, {}, {})
+
+    def load(self):
+        self.index(Ingredient.objects.values_list('id', 'name'))
+
+    def index(self, items):
+        names = {}
+        sizes = {}
+        postings = defaultdict(list)
+        for pk, name in items:
+            grams = trigrams(name)
+            names[pk] = name.lower()
+            sizes[pk] = len(grams)
+            for gram in grams:
+                postings[gram].append(pk)
+        self.snapshot = TrigramSnapshot(names, sizes, dict(postings))
+
+    def search(self, query, limit):
+        names, sizes, postings = self.snapshot
+        query = query.lower()
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(postings.get(gram, ()))
+        ranked = []
+        for pk, common in shared.items():
+            similarity = common / (len(query_grams) + sizes[pk] - common)
+            is_prefix = names[pk].startswith(query)
+            if is_prefix or similarity >= TRIGRAM_SIMILARITY_THRESHOLD:
+                ranked.append((not is_prefix, -similarity, names[pk], pk))
+        return [item[-1] for item in heapq.nsmallest(limit, ranked)]
+
+
+ingredient_index = TrigramIndex()
@@ -9,14 +9,24 @@ from receipts.models import (
     IngredientInReceipt,
     Receipt,
     ShoppingCart,
+    SimilarRecipe,
     Subscription,
     Tag
 )
 
+from .caching import user_receipt_ids
+from .fieldsets import SparseFieldsMixin
+from .instrumentation import TimedSerializerMixin
+from .signals import recipe_ingredients_changed
+
 User = get_user_model()
 
 
-class UserSerializer(DjoserUserSerializer):
+class UserSerializer(
+    TimedSerializerMixin,
+    SparseFieldsMixin,
+    DjoserUserSerializer
+):
     avatar = Base64ImageField(
         required=False,
         allow_null=True
@@ -35,14 +45,10 @@ class UserSerializer(DjoserUserSerializer):
         request = self.context['request']
         if not request or not request.user.is_authenticated:
             return False
-        user = request.user
-        return Subscription.objects.filter(
-            follower=user,
-            author=author
-        ).exists()
+        return author.id in user_receipt_ids(request.user, 'subscriptions')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = (
@@ -52,7 +58,10 @@ class IngredientSerializer(serializers.ModelSerializer):
         )
 
 
-class ReceiptIngredientSerializer(serializers.ModelSerializer):
+class ReceiptIngredientSerializer(
+    SparseFieldsMixin,
+    serializers.ModelSerializer
+):
     id = serializers.IntegerField(source='ingredient.id')
     name = serializers.CharField(source='ingredient.name')
     measurement_unit = serializers.CharField(
@@ -81,13 +90,21 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(
+    TimedSerializerMixin,
+    SparseFieldsMixin,
+    serializers.ModelSerializer
+):
     class Meta:
         model = Tag
         fields = '__all__'
 
 
-class ReceiptSerializer(serializers.ModelSerializer):
+class ReceiptSerializer(
+    TimedSerializerMixin,
+    SparseFieldsMixin,
+    serializers.ModelSerializer
+):
     author = UserSerializer()
     ingredients = ReceiptIngredientSerializer(
         source='ingredients_in_receipts',
@@ -131,7 +148,15 @@ class ReceiptSerializer(serializers.ModelSerializer):
         ).exists()
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+
+
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = UserSerializer(default=serializers.CurrentUserDefault())
     ingredients = RecipeIngredientSerializer(many=True, required=True)
     tags = serializers.PrimaryKeyRelatedField(
@@ -227,6 +252,10 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
             for ingredient in ingredients
         )
+        recipe_ingredients_changed.send(
+            sender=IngredientInReceipt,
+            receipt_ids=[receipt.id]
+        )
 
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
@@ -251,12 +280,26 @@ class RecipeSerializer(serializers.ModelSerializer):
         ).data
 
 
-class UserRecipesSerializer(serializers.ModelSerializer):
+class UserRecipesSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Receipt
         fields = ['id', 'name', 'image', 'cooking_time']
 
 
+class SimilarRecipeSerializer(
+    TimedSerializerMixin,
+    serializers.ModelSerializer
+):
+    id = serializers.IntegerField(source='similar.id')
+    name = serializers.CharField(source='similar.name')
+    image = serializers.ImageField(source='similar.image')
+    cooking_time = serializers.IntegerField(source='similar.cooking_time')
+
+    class Meta:
+        model = SimilarRecipe
+        fields = ('id', 'name', 'image', 'cooking_time', 'score')
+
+
 class UserSubscriberSerializer(UserSerializer):
     recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
@@ -276,10 +319,15 @@ class UserSubscriberSerializer(UserSerializer):
         return UserRecipesSerializer(recipes, many=True).data
 
     def get_recipes_count(self, user):
+        if hasattr(user, 'recipes_count'):
+            return user.recipes_count
         return user.recipes.count()
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(
+    TimedSerializerMixin,
+    serializers.ModelSerializer
+):
     subscriptions = serializers.SerializerMethodField()
 
     class Meta:
@@ -0,0 +1,76 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from receipts.models import (
+    Favourite,
+    Ingredient,
+    IngredientInReceipt,
+    Receipt,
+    ShoppingCart,
+    Subscription,
+    Tag
+)
+from receipts.similarity import mark_for_refresh
+
+from .caching import invalidate_catalog_snapshot, invalidate_user_receipt_ids
+from .executors import execute_in_context
+from .indexes import RECIPE_INGREDIENT_INDEXES
+from .search import ingredient_index
+
+recipe_ingredients_changed = Signal()
+
+
+@receiver(connection_created)
+def install_execute_in_context(connection, **kwargs):
+    if execute_in_context not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, execute_in_context)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
+    invalidate_catalog_snapshot('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags_catalog(**kwargs):
+    invalidate_catalog_snapshot('tags')
+
+
+@receiver(post_save, sender=IngredientInReceipt)
+def index_ingredient_in_receipt(instance, created, **kwargs):
+    for index in RECIPE_INGREDIENT_INDEXES:
+        if created:
+            index.add(instance.ingredient_id, instance.receipt_id)
+        else:
+            index.refresh_recipes([instance.receipt_id])
+
+
+@receiver(post_delete, sender=IngredientInReceipt)
+def unindex_ingredient_in_receipt(instance, **kwargs):
+    for index in RECIPE_INGREDIENT_INDEXES:
+        index.discard(instance.ingredient_id, instance.receipt_id)
+
+
+@receiver(recipe_ingredients_changed)
+def reindex_recipe_ingredients(receipt_ids, **kwargs):
+    for index in RECIPE_INGREDIENT_INDEXES:
+        index.refresh_recipes(receipt_ids)
+    mark_for_refresh(receipt_ids)
+    Receipt.objects.filter(pk__in=receipt_ids).touch()
+
+
+@receiver((post_save, post_delete), sender=Favourite)
+def invalidate_user_favourites(instance, **kwargs):
+    invalidate_user_receipt_ids(instance.user_id, 'favourites')
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def invalidate_user_shopping_cart(instance, **kwargs):
+    invalidate_user_receipt_ids(instance.user_id, 'shopping_cart')
+
+
+@receiver((post_save, post_delete), sender=Subscription)
+def invalidate_user_subscriptions(instance, **kwargs):
+    invalidate_user_receipt_ids(instance.follower_id, 'subscriptions')
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register('recipes', views.ReceiptViewSet, basename='recipes')
@@ -11,7 +11,14 @@ router.register('users', views.UsersViewSet, basename='users')
 
 
 urlpatterns = [
-    path('users/me/avatar/', views.AvatarView.as_view(), name='avatar'),
+    path('users/me/avatar/', async_views.avatar, name='avatar'),
+    path('recipes/download_shopping_cart/',
+         async_views.download_shopping_cart,
+         name='recipes-download-shopping-cart'),
+    path('tags/', async_views.catalog_view('tags'), name='tags-list'),
+    path('ingredients/', async_views.catalog_view('ingredients'),
+         name='ingredients-list'),
+    path('bootstrap/', views.BootstrapView.as_view(), name='bootstrap'),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
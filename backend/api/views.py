@@ -1,36 +1,66 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import FileResponse, HttpResponseRedirect
+from django.db.models import Count
+from django.http import Http404
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    AllowAny,
+    IsAuthenticated
+)
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
+from backend.postgresql_pool.base import pool_metrics
+
+from .caching import (
+    conditional_response,
+    receipt_etag,
+    receipt_list_etag,
+    render_cached_receipts,
+    set_validators,
+    user_receipt_ids
+)
+from .fieldsets import SparseFieldsViewMixin
 from .filters import IngredientFilter, ReceiptFilter
+from .indexes import cookable_index
+from .instrumentation import measure, metrics_registry
 from .paginations import LimitPagination
-from .permissions import IsAuthorOrReadOnly
+from .permissions import IsAuthorOrReadOnly, MetricsPermission
 from .serializers import (
     IngredientSerializer,
+    PantrySerializer,
+    SimilarRecipeSerializer,
     ReceiptSerializer,
     RecipeSerializer,
     TagSerializer,
-    AvatarSerializer,
+    UserSerializer,
     UserSubscriberSerializer,
     UserRecipesSerializer
 )
-from .utils import generate_shopping_list
+from receipts.constants import (
+    RECEIPT_FIELD_PROFILES,
+    SIMILAR_RECIPES_COUNT,
+    SIMILAR_RECIPES_DEFAULT_LIMIT,
+    USER_FIELD_PROFILES
+)
 from receipts.models import (
     Favourite,
     Ingredient,
     Receipt,
     ShoppingCart,
+    SimilarRecipe,
     Subscription,
-    Tag
+    Tag,
+    with_any_tags
 )
 
 User = get_user_model()
@@ -53,8 +83,9 @@ class IngredientViewSet(IngredientTagMixin):
     filter_backends = (DjangoFilterBackend,)
 
 
-class ReceiptViewSet(viewsets.ModelViewSet):
+class ReceiptViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     pagination_class = LimitPagination
+    field_profiles = RECEIPT_FIELD_PROFILES
     permission_classes = (IsAuthorOrReadOnly,)
     queryset = Receipt.objects.all()
     serializer_class = ReceiptSerializer
@@ -62,6 +93,7 @@ class ReceiptViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     http_method_names = ['get', 'post', 'patch', 'delete']
     lookup_field = 'pk'
+    lookup_value_regex = r'\d+'
 
     def perform_create(self, serializer):
         serializer.save(
@@ -73,6 +105,44 @@ class ReceiptViewSet(viewsets.ModelViewSet):
             return RecipeSerializer
         return ReceiptSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'retrieve':
+            return queryset
+        if self.fieldset.includes('author'):
+            queryset = queryset.select_related('author')
+        if self.fieldset.includes('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if self.fieldset.includes('ingredients'):
+            queryset = queryset.prefetch_related(
+                'ingredients_in_receipts__ingredient'
+            )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values_list('id', 'version'))
+        etag = receipt_list_etag(
+            request, self.paginator.page.paginator.count, page, self.fieldset
+        )
+        response = conditional_response(request, etag, None)
+        if response is None:
+            with measure('serialize'):
+                data = render_cached_receipts(page, request, self.fieldset)
+            response = self.get_paginated_response(data)
+        return set_validators(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        state = get_object_or_404(
+            Receipt.objects.values('id', 'author_id', 'version', 'updated_at'),
+            pk=kwargs['pk']
+        )
+        etag = receipt_etag(request, state)
+        response = conditional_response(request, etag, state['updated_at'])
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, state['updated_at'])
+
     def _shopping_cart_or_favorite(self, request, model, **kwargs):
         user = request.user
         receipt = get_object_or_404(Receipt, pk=kwargs['pk'])
@@ -117,6 +187,76 @@ class ReceiptViewSet(viewsets.ModelViewSet):
             **kwargs
         )
 
+    @action(
+        methods=['post'],
+        detail=False,
+        url_path='cookable',
+        permission_classes=[AllowAny]
+    )
+    def cookable(self, request):
+        pantry = PantrySerializer(data=request.data)
+        pantry.is_valid(raise_exception=True)
+        cookable_index.ensure_fresh()
+        ranking = cookable_index.rank(
+            pantry.validated_data['ingredients'],
+            pantry.validated_data.get('max_missing')
+        )
+        page = self.paginate_queryset(ranking)
+        scores = {
+            receipt_id: (coverage, missing_count)
+            for receipt_id, coverage, missing_count in page
+        }
+        versions = dict(Receipt.objects.filter(id__in=scores).values_list(
+            'id', 'version'
+        ))
+        cards = render_cached_receipts(
+            [
+                (receipt_id, versions[receipt_id])
+                for receipt_id in scores if receipt_id in versions
+            ],
+            request
+        )
+        return self.get_paginated_response([
+            {
+                **card,
+                'coverage': scores[card['id']][0],
+                'missing_count': scores[card['id']][1],
+            }
+            for card in cards
+        ])
+
+    @action(methods=['get'], detail=True, url_path='similar')
+    def similar(self, request, **kwargs):
+        try:
+            limit = min(
+                int(request.query_params.get(
+                    'limit', SIMILAR_RECIPES_DEFAULT_LIMIT
+                )),
+                SIMILAR_RECIPES_COUNT
+            )
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        similar_recipes = SimilarRecipe.objects.filter(
+            receipt_id=kwargs['pk']
+        ).select_related('similar').order_by('rank')
+        tags = request.query_params.getlist('tags')
+        if tags:
+            similar_recipes = with_any_tags(
+                similar_recipes,
+                Tag.objects.filter(slug__in=tags).values_list('id', flat=True),
+                prefix='similar__'
+            )
+        similar_recipes = similar_recipes[:max(limit, 0)]
+        if not similar_recipes and not Receipt.objects.filter(
+            pk=kwargs['pk']
+        ).exists():
+            raise Http404
+        return Response(SimilarRecipeSerializer(
+            similar_recipes,
+            many=True,
+            context={'request': request}
+        ).data)
+
     @action(methods=['get'], detail=True, url_path='get-link')
     def get_link(self, request, **kwargs):
         get_object_or_404(Receipt, pk=kwargs['pk'])
@@ -128,30 +268,22 @@ class ReceiptViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
 
-    @action(methods=['get'], detail=False, url_path='download_shopping_cart')
-    def download_shopping_cart(self, request):
-        return FileResponse(
-            generate_shopping_list(request.user),
-            filename='shopping_list.txt',
-            content_type='text/plain; charset=utf-8'
-        )
 
+class MetricsView(APIView):
+    permission_classes = (MetricsPermission,)
 
-class ReceiptShortLinkView(APIView):
-
-    def get(self, request, **kwargs):
-        receipt_id = kwargs.get('receipt_id')
-        get_object_or_404(
-            Receipt,
-            id=receipt_id
-        )
-        return HttpResponseRedirect(
-            request.build_absolute_uri(f'/recipes/{receipt_id}/')
+    def get(self, request):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise Http404
+        return HttpResponse(
+            metrics_registry.render() + pool_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
         )
 
 
-class UsersViewSet(UserViewSet):
+class UsersViewSet(SparseFieldsViewMixin, UserViewSet):
     pagination_class = LimitPagination
+    field_profiles = USER_FIELD_PROFILES
 
     def get_permissions(self):
         if self.action == settings.RESERVED_USERNAME:
@@ -165,20 +297,26 @@ class UsersViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(authors__follower=request.user)
+        queryset = User.objects.filter(
+            authors__follower=request.user
+        ).order_by('username')
+        if self.fieldset.includes('recipes_count'):
+            queryset = queryset.annotate(recipes_count=Count('recipes'))
+        if self.fieldset.includes('recipes'):
+            queryset = queryset.prefetch_related('recipes')
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = UserSubscriberSerializer(
                 page,
                 many=True,
-                context={'request': request}
+                context=self.get_serializer_context()
             )
             return self.get_paginated_response(serializer.data)
 
         serializer = UserSubscriberSerializer(
             queryset,
             many=True,
-            context={'request': request}
+            context=self.get_serializer_context()
         )
         return Response(serializer.data)
 
@@ -220,18 +358,49 @@ class UsersViewSet(UserViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AvatarView(APIView):
-    permission_classes = (IsAuthorOrReadOnly,)
+class BootstrapView(SparseFieldsViewMixin, APIView):
+    field_profiles = RECEIPT_FIELD_PROFILES
 
-    def put(self, request):
+    def get(self, request):
         user = request.user
-        serializer = AvatarSerializer(user, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    def delete(self, request):
-        user = request.user
-        user.avatar = None
-        user.save()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        paginator = LimitPagination()
+        page = paginator.paginate_queryset(
+            Receipt.objects.values_list('id', 'version'),
+            request,
+            view=self
+        )
+        with measure('serialize'):
+            recipes = render_cached_receipts(page, request, self.fieldset)
+        recipes_url = request.build_absolute_uri(
+            f'{reverse("recipes-list")}?{request.GET.urlencode()}'
+        )
+        next_page = previous_page = None
+        if paginator.page.has_next():
+            next_page = replace_query_param(
+                recipes_url,
+                paginator.page_query_param,
+                paginator.page.next_page_number()
+            )
+        if paginator.page.has_previous():
+            previous_page = replace_query_param(
+                recipes_url,
+                paginator.page_query_param,
+                paginator.page.previous_page_number()
+            )
+        authenticated = user.is_authenticated
+        return Response({
+            'user': UserSerializer(
+                user, context={'request': request}
+            ).data if authenticated else None,
+            'tags': TagSerializer(Tag.objects.all(), many=True).data,
+            'recipes': {
+                'count': paginator.page.paginator.count,
+                'next': next_page,
+                'previous': previous_page,
+                'results': recipes,
+            },
+            'favorites_count': len(user_receipt_ids(user, 'favourites')),
+            'shopping_cart_count': len(
+                user_receipt_ids(user, 'shopping_cart')
+            ),
+        })
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgreSQLDatabaseWrapper
+)
+from django.db.utils import OperationalError
+from psycopg2.extensions import STATUS_READY
+
+POOL_DEFAULTS = {
+    'SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_AGE': 600,
+    'CHECK': True,
+}
+POOL_COUNTERS = (
+    'checkouts', 'created', 'recycled', 'discarded', 'timeouts', 'wait_seconds'
+)
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, size, timeout, max_age, check):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check = check
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._created_at = {}
+        self.in_use = 0
+        self.stats = dict.fromkeys(POOL_COUNTERS, 0)
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise OperationalError(
+                f'Нет свободных соединений в пуле за {self.timeout} с.'
+            )
+        try:
+            connection = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+            self.stats['checkouts'] += 1
+            self.stats['wait_seconds'] += time.monotonic() - started
+        return connection
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self.connect()
+                with self._lock:
+                    self._created_at[connection] = time.monotonic()
+                    self.stats['created'] += 1
+                return connection
+            if self._expired(connection):
+                self._discard(connection, 'recycled')
+            elif not self._healthy(connection):
+                self._discard(connection, 'discarded')
+            else:
+                return connection
+
+    def release(self, connection):
+        with self._lock:
+            self.in_use -= 1
+        try:
+            if connection.closed or self._expired(connection):
+                self._discard(connection, 'recycled')
+                return
+            if connection.status != STATUS_READY:
+                connection.rollback()
+            with self._lock:
+                self._idle.append(connection)
+        except Exception:
+            self._discard(connection, 'discarded')
+        finally:
+            self._slots.release()
+
+    def _expired(self, connection):
+        return (
+            time.monotonic() - self._created_at.get(connection, 0)
+            > self.max_age
+        )
+
+    def _healthy(self, connection):
+        if connection.closed:
+            return False
+        if not self.check:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection, reason):
+        with self._lock:
+            self._created_at.pop(connection, None)
+            self.stats[reason] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection, 'discarded')
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self.in_use,
+                **self.stats,
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+os.register_at_fork(after_in_child=pools.clear)
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+
+    @property
+    def pool(self):
+        with pools_lock:
+            if self.alias not in pools:
+                options = {
+                    **POOL_DEFAULTS, **self.settings_dict.get('POOL', {})
+                }
+                pools[self.alias] = ConnectionPool(
+                    lambda: super(DatabaseWrapper, self).get_new_connection(
+                        self.get_connection_params()
+                    ),
+                    size=options['SIZE'],
+                    timeout=options['TIMEOUT'],
+                    max_age=options['MAX_AGE'],
+                    check=options['CHECK'],
+                )
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.in_atomic_block:
+            self.connection.close()
+        self.pool.release(self.connection)
+
+
+def close_pools():
+    with pools_lock:
+        closing = list(pools.values())
+        pools.clear()
+    for pool in closing:
+        pool.close()
+
+
+def pool_metrics():
+    with pools_lock:
+        snapshot = {alias: pool.metrics() for alias, pool in pools.items()}
+    lines = []
+    for name in ('size', 'idle', 'in_use'):
+        lines.append(f'# TYPE foodgram_db_pool_{name} gauge')
+        lines.extend(
+            f'foodgram_db_pool_{name}{{alias="{alias}"}} {metrics[name]}'
+            for alias, metrics in snapshot.items()
+        )
+    for name in POOL_COUNTERS:
+        lines.append(f'# TYPE foodgram_db_pool_{name}_total counter')
+        lines.extend(
+            f'foodgram_db_pool_{name}_total{{alias="{alias}"}} '
+            f'{metrics[name]}'
+            for alias, metrics in snapshot.items()
+        )
+    return '\n'.join(lines) + '\n' if snapshot else ''
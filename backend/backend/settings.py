@@ -1,4 +1,5 @@
 from pathlib import Path
+from urllib.parse import urlsplit
 
 from environs import Env
 
@@ -25,6 +26,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'admin_auto_filters',
     'api',
     'receipts',
     'rest_framework',
@@ -34,6 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
+    'api.inspection.QueryInspectionMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,12 +78,53 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     } if env('DATABASE') == 'sqlite' else {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'backend.postgresql_pool' if env.int('DB_POOL_SIZE', 10)
+            else 'django.db.backends.postgresql'
+        ),
         'NAME': env('POSTGRES_DB', 'foodgram'),
         'USER': env('POSTGRES_USER', 'foodgram_user'),
         'PASSWORD': env('POSTGRES_PASSWORD', ''),
         'HOST': env('DB_HOST', ''),
         'PORT': env('DB_PORT', 5432),
+        'POOL': {
+            'SIZE': env.int('DB_POOL_SIZE', 10),
+            'TIMEOUT': env.float('DB_POOL_TIMEOUT', 10),
+            'MAX_AGE': env.int('DB_POOL_MAX_AGE', 600),
+            'CHECK': env.bool('DB_POOL_CHECK', True),
+        },
+    }
+}
+
+for number, replica in enumerate(env.list('DB_REPLICAS', []), 1):
+    location = urlsplit(f'//{replica}')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        **({'NAME': replica} if env('DATABASE') == 'sqlite' else {
+            'NAME': location.path.lstrip('/') or DATABASES['default']['NAME'],
+            'HOST': location.hostname,
+            'PORT': location.port or DATABASES['default']['PORT'],
+        }),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+PRIMARY_PIN_SECONDS = env.int('PRIMARY_PIN_SECONDS', 5)
+
+ASYNC_DATABASE_THREADS = env.int('ASYNC_DATABASE_THREADS', 8)
+
+CACHE_LOCATION = env('CACHE_LOCATION', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': env(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.PyMemcacheCache'
+            if CACHE_LOCATION
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': CACHE_LOCATION,
     }
 }
 
@@ -132,7 +179,12 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 6,
@@ -161,3 +213,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'receipts.User'
 
 RESERVED_USERNAME = 'me'
+
+PERFORMANCE_INSTRUMENTATION = env.bool('PERFORMANCE_INSTRUMENTATION', False)
+METRICS_TOKEN = env('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = env.list('METRICS_ALLOWED_IPS', [])
+
+QUERY_INSPECTION = env('QUERY_INSPECTION', '')
+QUERY_INSPECTION_REPORT = env('QUERY_INSPECTION_REPORT', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'api.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
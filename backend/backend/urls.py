@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 
-from api.views import ReceiptShortLinkView
+from api.async_views import receipt_short_link
+from api.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    path('s/<int:receipt_id>/', ReceiptShortLinkView.as_view(),
+    path('s/<int:receipt_id>/', receipt_short_link,
          name='receipt-short-link'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,59 @@
+import multiprocessing
+
+from environs import Env
+
+env = Env()
+env.read_env()
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = env('GUNICORN_BIND', '0.0.0.0:8050')
+worker_class = env('GUNICORN_WORKER_CLASS', 'gthread')
+workers = env.int('GUNICORN_WORKERS', cpu_count * 2 + 1)
+threads = env.int(
+    'GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1
+)
+wsgi_app = (
+    'backend.asgi:application' if worker_class.startswith('uvicorn')
+    else 'backend.wsgi:application'
+)
+
+preload_app = env.bool('GUNICORN_PRELOAD', True)
+max_requests = env.int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env.int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+timeout = env.int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env.int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env.int('GUNICORN_KEEPALIVE', 5)
+worker_tmp_dir = env('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+
+accesslog = env('GUNICORN_ACCESS_LOG', None)
+errorlog = '-'
+loglevel = env('GUNICORN_LOG_LEVEL', 'info')
+
+warm_indexes = env.bool('GUNICORN_WARM_INDEXES', preload_app)
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import DatabaseError, connections
+
+    from backend.postgresql_pool.base import close_pools
+
+    if warm_indexes:
+        from api.indexes import cookable_index, ingredient_recipe_index
+        from api.search import ingredient_index
+
+        try:
+            for index in (
+                ingredient_index, ingredient_recipe_index, cookable_index
+            ):
+                index.ensure_fresh()
+        except DatabaseError as error:
+            server.log.warning(
+                'In-memory indexes are left to workers: %s', error
+            )
+        else:
+            server.log.info('In-memory indexes warmed before fork')
+    connections.close_all()
+    close_pools()
@@ -1,21 +1,31 @@
-import ast
-from datetime import timedelta, date
+from datetime import datetime, time, timedelta
 
+from admin_auto_filters.filters import AutocompleteFilter
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
 from .models import (
+    AuthorStatistics,
     Ingredient,
+    IngredientStatistics,
     Receipt,
+    RecipeStatistics,
     Tag,
+    TagWeekStatistics,
     IngredientInReceipt,
     Favourite,
     ShoppingCart,
+    StatisticsWatermark,
     Subscription
 )
 from .constants import (
@@ -24,13 +34,28 @@ from .constants import (
     SHORT_COOKING_TIME_TEXT,
     MEDIUM_COOKING_TIME_TEXT,
     LONG_COOKING_TIME_TEXT,
+    RECEIPT_FACETS_CACHE_KEY,
+    RECEIPT_FACETS_CACHE_TTL,
 )
+from .exports import dataset_for_model, export_lines, export_queryset
+from .paginations import EstimatedCountPaginator
 
 User = get_user_model()
 
 admin.site.unregister(Group)
 
 
+def count_subquery(queryset, field_name):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field_name: OuterRef('pk')}).order_by().values(
+                field_name
+            ).annotate(count=Count('pk')).values('count')
+        ),
+        0
+    )
+
+
 class UsedInRecipesFilter(admin.SimpleListFilter):
     title = 'Используется в рецептах'
     parameter_name = 'used_in_recipes'
@@ -68,9 +93,14 @@ class IngredientAdmin(admin.ModelAdmin):
         'name',
     )
 
-    @admin.display(description='Рецепты')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=Count('ingredients_in_receipts')
+        )
+
+    @admin.display(description='Рецепты', ordering='recipes_count')
     def recipes_count(self, ingredient):
-        return ingredient.recipes.count()
+        return ingredient.recipes_count
 
 
 @admin.register(Tag)
@@ -90,9 +120,14 @@ class TagAdmin(admin.ModelAdmin):
         'slug',
     )
 
-    @admin.display(description='Рецепты')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=Count('recipes')
+        )
+
+    @admin.display(description='Рецепты', ordering='recipes_count')
     def recipes_count(self, tag):
-        return tag.recipes.count()
+        return tag.recipes_count
 
 
 class ReceiptIngredientsInline(admin.TabularInline):
@@ -100,127 +135,152 @@ class ReceiptIngredientsInline(admin.TabularInline):
     verbose_name_plural = 'ingredients'
 
 
+@admin.action(description='Выгрузить выбранные записи в CSV')
+def export_csv(modeladmin, request, queryset):
+    dataset = dataset_for_model(queryset.model)
+    queryset, columns = export_queryset(dataset, queryset=queryset)
+    # Django 3.2 под ASGI перебирает потоковый ответ в цикле событий, где
+    # запросы к базе запрещены, поэтому там выгрузка собирается целиком.
+    response_class = (
+        HttpResponse if isinstance(request, ASGIRequest)
+        else StreamingHttpResponse
+    )
+    response = response_class(
+        export_lines(queryset, columns, 'csv'),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{dataset}.csv"'
+    )
+    return response
+
+
+def published_date_ranges():
+    today = timezone.localdate()
+    start_of_week = today - timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+    return {
+        'today': Q(published_at__gte=start_of_day(today)),
+        'this_week': Q(published_at__gte=start_of_day(start_of_week)),
+        'this_month': Q(published_at__gte=start_of_day(start_of_month)),
+        'older': Q(published_at__lt=start_of_day(start_of_month)),
+    }
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+COOKING_TIME_RANGES = {
+    'short': Q(cooking_time__lte=SHORT_COOKING_TIME),
+    'medium': Q(cooking_time__range=(
+        SHORT_COOKING_TIME + 1, MEDIUM_COOKING_TIME
+    )),
+    'long': Q(cooking_time__gt=MEDIUM_COOKING_TIME),
+}
+
+
+def receipt_facets(request):
+    if not hasattr(request, '_receipt_facets'):
+        cache_key = (
+            f'{RECEIPT_FACETS_CACHE_KEY}:{timezone.localdate().isoformat()}'
+        )
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = Receipt.objects.aggregate(**{
+                f'{prefix}_{name}': Count('pk', filter=condition)
+                for prefix, ranges in (
+                    ('cooking_time', COOKING_TIME_RANGES),
+                    ('published_at', published_date_ranges()),
+                )
+                for name, condition in ranges.items()
+            })
+            cache.set(cache_key, facets, RECEIPT_FACETS_CACHE_TTL)
+        request._receipt_facets = facets
+    return request._receipt_facets
+
+
 class CookingTimeFilter(admin.SimpleListFilter):
     title = 'Время приготовления'
     parameter_name = 'cooking_time'
 
     def lookups(self, request, model_admin):
-        short_range = (0, SHORT_COOKING_TIME)
-        medium_range = (SHORT_COOKING_TIME + 1, MEDIUM_COOKING_TIME)
-        long_range = (MEDIUM_COOKING_TIME + 1, 10**10)
-
-        short_count = Receipt.objects.filter(
-            cooking_time__range=short_range
-        ).count()
-        medium_count = Receipt.objects.filter(
-            cooking_time__range=medium_range
-        ).count()
-        long_count = Receipt.objects.filter(
-            cooking_time__range=long_range
-        ).count()
-
+        facets = receipt_facets(request)
         return [
             (
-                short_range,
+                'short',
                 SHORT_COOKING_TIME_TEXT.format(
                     short_time=SHORT_COOKING_TIME,
-                    short_count=short_count
+                    short_count=facets['cooking_time_short']
                 )
             ),
             (
-                medium_range,
+                'medium',
                 MEDIUM_COOKING_TIME_TEXT.format(
                     short_time=SHORT_COOKING_TIME,
                     medium_time=MEDIUM_COOKING_TIME,
-                    medium_count=medium_count
+                    medium_count=facets['cooking_time_medium']
                 )
             ),
             (
-                long_range,
+                'long',
                 LONG_COOKING_TIME_TEXT.format(
                     medium_time=MEDIUM_COOKING_TIME,
-                    long_count=long_count
+                    long_count=facets['cooking_time_long']
                 )
             ),
         ]
 
     def queryset(self, request, queryset):
-        if not self.value():
+        if self.value() not in COOKING_TIME_RANGES:
             return queryset
-        return queryset.filter(
-            cooking_time__range=ast.literal_eval(self.value())
-        )
+        return queryset.filter(COOKING_TIME_RANGES[self.value()])
 
 
 class PublishedDateFilter(admin.SimpleListFilter):
     title = 'Дата публикации'
     parameter_name = 'published_at'
 
-    def get_filter_params(self):
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        start_of_month = today.replace(day=1)
-        very_old_date = date(1970, 1, 1)
-
-        today_count = Receipt.objects.filter(
-            published_at__date=today
-        ).count()
-        this_week_count = Receipt.objects.filter(
-            published_at__date__gte=start_of_week
-        ).count()
-        this_month_count = Receipt.objects.filter(
-            published_at__date__gte=start_of_month
-        ).count()
-        older_count = Receipt.objects.filter(
-            published_at__date__lt=start_of_month
-        ).count()
-
-        return [
-            ('today', (today, today), today_count),
-            ('this_week', (start_of_week, today), this_week_count),
-            ('this_month', (start_of_month, today), this_month_count),
-            ('older', (very_old_date, start_of_month - timedelta(days=1)),
-             older_count
-             ),
-        ]
-
     def lookups(self, request, model_admin):
-        filter_params = self.get_filter_params()
+        facets = receipt_facets(request)
         return (
             (
                 'today',
-                'Сегодня ({count})'.format(count=filter_params[0][2])
+                'Сегодня ({count})'.format(
+                    count=facets['published_at_today']
+                )
             ),
             (
                 'this_week',
-                'На этой неделе ({count})'.format(count=filter_params[1][2])
+                'На этой неделе ({count})'.format(
+                    count=facets['published_at_this_week']
+                )
             ),
             (
                 'this_month',
-                'В этом месяце ({count})'.format(count=filter_params[2][2])
+                'В этом месяце ({count})'.format(
+                    count=facets['published_at_this_month']
+                )
             ),
             (
                 'older',
-                'Ранее ({count})'.format(count=filter_params[3][2])
+                'Ранее ({count})'.format(
+                    count=facets['published_at_older']
+                )
             ),
         )
 
     def queryset(self, request, queryset):
-        value = self.value()
-        filter_params = self.get_filter_params()
-
-        for filter_name, (param1, param2), count in filter_params:
-            if value == filter_name:
-                return queryset.filter(
-                    published_at__date__range=(param1, param2)
-                )
-
-        return queryset
+        date_ranges = published_date_ranges()
+        if self.value() not in date_ranges:
+            return queryset
+        return queryset.filter(date_ranges[self.value()])
 
 
 @admin.register(Receipt)
 class ReceiptAdmin(admin.ModelAdmin):
     inlines = [ReceiptIngredientsInline]
+    actions = [export_csv]
     list_display = (
         'name',
         'author',
@@ -233,7 +293,7 @@ class ReceiptAdmin(admin.ModelAdmin):
         'name',
         'tags__name',
         'ingredients__name',
-        'description',
+        'text',
     )
     list_filter = (
         'tags',
@@ -244,6 +304,19 @@ class ReceiptAdmin(admin.ModelAdmin):
         'name',
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_in_receipts',
+                queryset=IngredientInReceipt.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+
     @admin.display(description='Время (мин)')
     def cooking_time_display(self, receipt):
         return receipt.cooking_time
@@ -331,25 +404,53 @@ class UserAdmin(UserAdmin):
         HasSubscriptionsFilter, HasSubscribersFilter, HasRecipesFilter
     )
 
-    @admin.display(description='Подписки')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            subscription_count=count_subquery(
+                Subscription.objects.all(), 'follower'
+            ),
+            subscriber_count=count_subquery(
+                Subscription.objects.all(), 'author'
+            ),
+            recipe_count=count_subquery(Receipt.objects.all(), 'author'),
+        )
+
+    @admin.display(description='Подписки', ordering='subscription_count')
     def subscription_count(self, user):
-        return user.followers.count()
+        return user.subscription_count
 
-    @admin.display(description='Подписчики')
+    @admin.display(description='Подписчики', ordering='subscriber_count')
     def subscriber_count(self, user):
-        return user.authors.count()
+        return user.subscriber_count
 
-    @admin.display(description='Рецепты')
+    @admin.display(description='Рецепты', ordering='recipe_count')
     def recipe_count(self, user):
-        return user.recipes.count()
+        return user.recipe_count
 
 
-class UserRecipeBaseAdmin(admin.ModelAdmin):
+class ReceiptAutocompleteFilter(AutocompleteFilter):
+    title = 'Рецепт'
+    field_name = 'receipt'
+
+
+class FollowerAutocompleteFilter(AutocompleteFilter):
+    title = 'Пользователь'
+    field_name = 'follower'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [export_csv]
+
+
+class UserRecipeBaseAdmin(LargeTableAdmin):
     list_display = (
         'user',
         'receipt',
     )
-    list_editable = (
+    autocomplete_fields = (
+        'user',
         'receipt',
     )
     search_fields = (
@@ -357,12 +458,17 @@ class UserRecipeBaseAdmin(admin.ModelAdmin):
         'user__username',
     )
     list_filter = (
-        'receipt__name',
+        ReceiptAutocompleteFilter,
     )
     list_display_links = (
         'user',
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'user', 'receipt'
+        )
+
 
 @admin.register(Favourite)
 class FavouriteAdmin(UserRecipeBaseAdmin):
@@ -375,12 +481,13 @@ class ShoppingCartAdmin(UserRecipeBaseAdmin):
 
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(LargeTableAdmin):
     list_display = (
         'follower',
         'author',
     )
-    list_editable = (
+    autocomplete_fields = (
+        'follower',
         'author',
     )
     search_fields = (
@@ -388,30 +495,38 @@ class SubscriptionAdmin(admin.ModelAdmin):
         'author__username',
     )
     list_filter = (
-        'follower__username',
+        FollowerAutocompleteFilter,
     )
     list_display_links = (
         'follower',
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'follower', 'author'
+        )
+
 
 @admin.register(IngredientInReceipt)
-class IngredientInReceiptAdmin(admin.ModelAdmin):
+class IngredientInReceiptAdmin(LargeTableAdmin):
     list_display = (
         'ingredient',
         'receipt',
         'amount',
     )
     list_editable = (
-        'ingredient',
         'amount',
     )
+    autocomplete_fields = (
+        'ingredient',
+        'receipt',
+    )
     search_fields = (
         'ingredient__name',
         'receipt__name',
     )
     list_filter = (
-        'receipt__name',
+        ReceiptAutocompleteFilter,
     )
     list_display_links = (
         'receipt',
@@ -421,3 +536,77 @@ class IngredientInReceiptAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('ingredient', 'receipt')
+
+
+class StatisticsAdmin(admin.ModelAdmin):
+    list_per_page = 50
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RecipeStatistics)
+class RecipeStatisticsAdmin(StatisticsAdmin):
+    list_display = (
+        'receipt',
+        'favourites_count',
+        'shopping_carts_count',
+    )
+    list_select_related = (
+        'receipt',
+    )
+
+
+@admin.register(IngredientStatistics)
+class IngredientStatisticsAdmin(StatisticsAdmin):
+    list_display = (
+        'ingredient',
+        'recipes_count',
+    )
+    list_select_related = (
+        'ingredient',
+    )
+
+
+@admin.register(AuthorStatistics)
+class AuthorStatisticsAdmin(StatisticsAdmin):
+    list_display = (
+        'author',
+        'followers_count',
+    )
+    list_select_related = (
+        'author',
+    )
+
+
+@admin.register(TagWeekStatistics)
+class TagWeekStatisticsAdmin(StatisticsAdmin):
+    list_display = (
+        'week',
+        'tag',
+        'recipes_count',
+    )
+    list_filter = (
+        'tag',
+    )
+    list_select_related = (
+        'tag',
+    )
+    date_hierarchy = 'week'
+
+
+@admin.register(StatisticsWatermark)
+class StatisticsWatermarkAdmin(StatisticsAdmin):
+    list_display = (
+        'name',
+        'last_id',
+        'last_published_at',
+        'refreshed_at',
+    )
@@ -5,3 +5,6 @@ class ReceiptsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'receipts'
     verbose_name = 'Рецепты'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -15,3 +15,89 @@ TODAY_TEXT = "За сегодня ({count})"
 THIS_WEEK_TEXT = "За эту неделю ({count})"
 THIS_MONTH_TEXT = "За этот месяц ({count})"
 OLDER_TEXT = "Старые ({count})"
+
+INGREDIENT_SEARCH_LIMIT = 10
+TRIGRAM_SIMILARITY_THRESHOLD = 0.3
+SEARCH_INDEX_TTL = 300
+INGREDIENT_INDEX_IDS_LIMIT = 500
+COOKABLE_OVERRIDES_LIMIT = 1000
+TAGS_MASK_BITS = 63
+
+RECEIPT_FACETS_CACHE_KEY = 'admin:receipt_facets'
+RECEIPT_FACETS_CACHE_TTL = 60
+
+ESTIMATED_COUNT_THRESHOLD = 10000
+ESTIMATED_COUNT_CACHE_TTL = 300
+
+EXPORT_CHUNK_SIZE = 2000
+
+STATISTICS_PUBLICATION_LAG = 60
+
+SIMILAR_RECIPES_COUNT = 20
+SIMILAR_RECIPES_DEFAULT_LIMIT = 10
+SIMILARITY_CHUNK_SIZE = 128
+
+POPULARITY_HALF_LIFE_DAYS = 7
+POPULARITY_FAVOURITE_WEIGHT = 2
+POPULARITY_SHOPPING_CART_WEIGHT = 1
+RECEIPT_IDS_LIMIT = 100
+RECEIPT_ORDERINGS = {
+    'popular': ('-popularity', '-id'),
+    'cooking_time': ('cooking_time', '-id'),
+    '-published_at': ('-published_at', '-id'),
+}
+
+REQUEST_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+REQUEST_QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+N_PLUS_ONE_THRESHOLD = 5
+SLOW_QUERY_THRESHOLD_MS = 100
+
+USER_FIELD_PROFILES = {
+    'compact': ('id', 'username', 'first_name', 'last_name'),
+}
+RECEIPT_FIELD_PROFILES = {
+    'compact': (
+        'id',
+        'name',
+        'image',
+        'cooking_time',
+        'tags',
+        *(f'author.{name}' for name in USER_FIELD_PROFILES['compact']),
+    ),
+}
+
+RECEIPT_AUTHOR_FIELDS = (
+    'username', 'first_name', 'last_name', 'email', 'avatar'
+)
+RECEIPT_CARD_CACHE_KEY = 'receipts:card:{}:{}'
+RECEIPT_CARD_CACHE_TTL = 60 * 60
+USER_RECEIPT_IDS_CACHE_KEY = 'users:{}:{}'
+USER_RECEIPT_IDS_CACHE_TTL = 60 * 60
+
+PRIMARY_PIN_COOKIE = 'pin_primary'
+PRIMARY_PIN_CACHE_KEY = 'replicas:pin:{}'
+
+CATALOG_CACHE_KEY = 'catalog:{}'
+CATALOG_CACHE_TTL = 24 * 60 * 60
+
+LOADTEST_IDENTITY_VARIABLES = (
+    'username',
+    'email',
+    'secondUserUsername',
+    'secondUserEmail',
+    'thirdUserUsername',
+    'thirdUserEmail',
+)
+LOADTEST_SCENARIO_WEIGHTS = {
+    'users/get_user_info': 3,
+    'tags/get_tags_info': 5,
+    'ingredients/get_ingradients': 5,
+    'recipes/get_recipes': 10,
+    'recipes/get_recipe_short_link': 3,
+    'subscriptions/get_subscriptions': 3,
+    'recipe_filters_for_favorite_and_shopping_cart': 5,
+}
+LOADTEST_PERCENTILES = (0.5, 0.9, 0.95, 0.99)
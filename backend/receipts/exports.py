@@ -0,0 +1,97 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .constants import EXPORT_CHUNK_SIZE
+from .models import (
+    Favourite,
+    IngredientInReceipt,
+    Receipt,
+    ShoppingCart,
+    Subscription
+)
+
+User = get_user_model()
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+DATASETS = {
+    'recipes': (
+        Receipt,
+        ('id', 'author_id', 'name', 'cooking_time', 'tags_mask',
+         'published_at'),
+    ),
+    'ingredients_in_recipes': (
+        IngredientInReceipt,
+        ('id', 'receipt_id', 'ingredient_id', 'amount'),
+    ),
+    'favourites': (
+        Favourite,
+        ('id', 'user_id', 'receipt_id'),
+    ),
+    'shopping_carts': (
+        ShoppingCart,
+        ('id', 'user_id', 'receipt_id'),
+    ),
+    'subscriptions': (
+        Subscription,
+        ('id', 'follower_id', 'author_id'),
+    ),
+    'users': (
+        User,
+        ('id', 'username', 'first_name', 'last_name', 'date_joined'),
+    ),
+}
+
+
+def dataset_for_model(model):
+    for name, (dataset_model, columns) in DATASETS.items():
+        if dataset_model is model:
+            return name
+    raise KeyError(model)
+
+
+def export_queryset(
+    dataset, columns=None, since_id=None, since=None, queryset=None
+):
+    model, allowed_columns = DATASETS[dataset]
+    columns = columns or allowed_columns
+    unknown = set(columns) - set(allowed_columns)
+    if unknown:
+        raise ValueError(
+            f'Неизвестные колонки для {dataset}: {", ".join(sorted(unknown))}'
+        )
+    if queryset is None:
+        queryset = model.objects.all()
+    queryset = queryset.order_by('id')
+    if since_id is not None:
+        queryset = queryset.filter(id__gt=since_id)
+    if since is not None:
+        if 'published_at' not in allowed_columns:
+            raise ValueError(f'У {dataset} нет поля published_at.')
+        queryset = queryset.filter(published_at__gt=since)
+    return queryset, columns
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def export_lines(queryset, columns, export_format):
+    rows = queryset.values_list(*columns).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(
+            dict(zip(columns, row)), ensure_ascii=False, cls=DjangoJSONEncoder
+        ) + '\n'
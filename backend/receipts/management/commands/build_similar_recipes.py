@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from receipts.constants import SIMILARITY_CHUNK_SIZE
+from receipts.similarity import build_similar_recipes, refresh_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Строит таблицу похожих рецептов по TF-IDF продуктов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Пересчитать только измененные рецепты и их соседей.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Число процессов; по умолчанию по числу ядер.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SIMILARITY_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['incremental']:
+            processed = refresh_similar_recipes(
+                workers=options['workers'] or 1,
+                chunk_size=options['chunk_size']
+            )
+        else:
+            processed = build_similar_recipes(
+                workers=options['workers'],
+                chunk_size=options['chunk_size']
+            )
+        self.stdout.write(
+            f'Пересчитано рецептов: {processed} '
+            f'за {time.perf_counter() - started:.1f} с.'
+        )
@@ -0,0 +1,79 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from receipts.exports import (
+    DATASETS,
+    EXPORT_FORMATS,
+    export_lines,
+    export_queryset
+)
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка данных в CSV или NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='csv'
+        )
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument(
+            '--columns', help='Колонки через запятую.'
+        )
+        parser.add_argument(
+            '--since-id', type=int, help='Выгрузить записи с id больше.'
+        )
+        parser.add_argument(
+            '--since', help='Выгрузить рецепты, опубликованные позже.'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('Неверный формат --since.')
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        try:
+            queryset, columns = export_queryset(
+                options['dataset'],
+                columns=(
+                    options['columns'].split(',')
+                    if options['columns'] else None
+                ),
+                since_id=options['since_id'],
+                since=since,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        last_id = queryset.aggregate(last_id=Max('id'))['last_id']
+        queryset = queryset.filter(id__lte=last_id or 0)
+        if options['output']:
+            opener = gzip.open if options['gzip'] else open
+            output = opener(
+                options['output'], 'wt', encoding='utf-8', newline=''
+            )
+        elif options['gzip']:
+            output = gzip.open(
+                sys.stdout.buffer, 'wt', encoding='utf-8', newline=''
+            )
+        else:
+            output = None
+        try:
+            for line in export_lines(queryset, columns, options['format']):
+                if output is None:
+                    self.stdout.write(line, ending='')
+                else:
+                    output.write(line)
+        finally:
+            if output is not None:
+                output.close()
+        self.stderr.write(f'Последний выгруженный id: {last_id}.')
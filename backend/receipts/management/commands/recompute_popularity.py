@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from receipts.popularity import recompute_popularity
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярность рецептов с затуханием по времени.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        recipes = recompute_popularity()
+        self.stdout.write(
+            f'Обновлено рецептов: {recipes} '
+            f'за {time.perf_counter() - started:.1f} с.'
+        )
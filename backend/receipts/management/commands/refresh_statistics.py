@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from receipts.statistics import refresh_statistics
+
+
+class Command(BaseCommand):
+    help = 'Инкрементально обновляет таблицы статистики для админки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать статистику с нуля.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for name, rows, seconds in refresh_statistics(full=options['full']):
+            total += seconds
+            self.stdout.write(
+                f'{name:<24} {rows:>10} строк {seconds * 1000:>10.1f} мс'
+            )
+        self.stdout.write(f'{"итого":<24} {"":>15} {total * 1000:>10.1f} мс')
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:31
+
+from django.db import migrations, models
+
+from receipts.constants import TAGS_MASK_BITS
+
+
+def fill_tags_mask(apps, schema_editor):
+    Receipt = apps.get_model('receipts', 'Receipt')
+    masks = {}
+    for receipt_id, tag_id in Receipt.tags.through.objects.values_list(
+        'receipt_id', 'tag_id'
+    ):
+        if 0 < tag_id < TAGS_MASK_BITS:
+            masks[receipt_id] = masks.get(receipt_id, 0) | 1 << tag_id
+    for receipt_id, mask in masks.items():
+        Receipt.objects.filter(pk=receipt_id).update(tags_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0009_ingredient_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='tags_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Битовая маска тегов'),
+        ),
+        migrations.RunPython(fill_tags_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0010_receipt_tags_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['-published_at', '-id'], name='receipt_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['author', '-published_at'], name='receipt_author_published_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0011_receipt_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStatistics',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='receipts.user', verbose_name='Автор')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчики')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'статистика авторов',
+                'ordering': ('-followers_count',),
+            },
+        ),
+        migrations.CreateModel(
+            name='IngredientStatistics',
+            fields=[
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='receipts.ingredient', verbose_name='Продукт')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='В рецептах')),
+            ],
+            options={
+                'verbose_name': 'Статистика продукта',
+                'verbose_name_plural': 'статистика продуктов',
+                'ordering': ('-recipes_count',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeStatistics',
+            fields=[
+                ('receipt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='receipts.receipt', verbose_name='Рецепт')),
+                ('favourites_count', models.PositiveIntegerField(default=0, verbose_name='В избранном')),
+                ('shopping_carts_count', models.PositiveIntegerField(default=0, verbose_name='В корзинах')),
+            ],
+            options={
+                'verbose_name': 'Статистика рецепта',
+                'verbose_name_plural': 'статистика рецептов',
+                'ordering': ('-favourites_count',),
+            },
+        ),
+        migrations.CreateModel(
+            name='StatisticsWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='Источник')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Последний учтенный ID')),
+                ('last_published_at', models.DateTimeField(null=True, verbose_name='Последняя учтенная публикация')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Отметка обновления статистики',
+                'verbose_name_plural': 'отметки обновления статистики',
+            },
+        ),
+        migrations.CreateModel(
+            name='TagWeekStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(verbose_name='Неделя')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='Рецепты')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='week_statistics', to='receipts.tag', verbose_name='Тег')),
+            ],
+            options={
+                'verbose_name': 'Рецепты тега за неделю',
+                'verbose_name_plural': 'рецепты тегов по неделям',
+                'ordering': ('-week', 'tag'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipestatistics',
+            index=models.Index(fields=['-favourites_count'], name='recipe_stats_favourites_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredientstatistics',
+            index=models.Index(fields=['-recipes_count'], name='ingredient_stats_recipes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authorstatistics',
+            index=models.Index(fields=['-followers_count'], name='author_stats_followers_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tagweekstatistics',
+            constraint=models.UniqueConstraint(fields=('tag', 'week'), name='unique_tag_week'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0012_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarRecipeRefresh',
+            fields=[
+                ('receipt_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID рецепта')),
+            ],
+            options={
+                'verbose_name': 'Рецепт для пересчета похожих',
+                'verbose_name_plural': 'рецепты для пересчета похожих',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('receipt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_recipes', to='receipts.receipt', verbose_name='Рецепт')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='receipts.receipt', verbose_name='Похожий рецепт')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'похожие рецепты',
+                'ordering': ('receipt', 'rank'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarrecipe',
+            constraint=models.UniqueConstraint(fields=('receipt', 'rank'), name='unique_receipt_similar_rank'),
+        ),
+    ]
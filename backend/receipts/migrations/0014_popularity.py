@@ -0,0 +1,43 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0013_similar_recipes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favourite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['-popularity', '-id'], name='receipt_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['author', '-popularity', '-id'], name='receipt_author_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['cooking_time', '-id'], name='receipt_cooking_time_idx'),
+        ),
+    ]
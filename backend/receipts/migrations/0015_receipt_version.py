@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    Receipt = apps.get_model('receipts', 'Receipt')
+    Receipt.objects.update(updated_at=models.F('published_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0014_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='version',
+            field=models.BigIntegerField(default=1, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['updated_at'], name='receipt_updated_at_idx'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
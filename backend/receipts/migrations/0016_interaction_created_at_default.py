@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0015_receipt_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favourite',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Добавлено'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Добавлено'),
+        ),
+    ]
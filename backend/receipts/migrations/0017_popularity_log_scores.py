@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models.functions import Exp, Ln
+
+
+def to_log_scores(apps, schema_editor):
+    Receipt = apps.get_model('receipts', 'Receipt')
+    Receipt.objects.filter(popularity__gt=0).update(
+        popularity=Ln('popularity')
+    )
+
+
+def to_linear_scores(apps, schema_editor):
+    Receipt = apps.get_model('receipts', 'Receipt')
+    Receipt.objects.exclude(popularity=0).update(
+        popularity=Exp('popularity')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0016_interaction_created_at_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_log_scores, to_linear_scores),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0017_popularity_log_scores'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredientinreceipt',
+            options={'default_related_name': 'ingredients_in_receipts', 'ordering': ('id',), 'verbose_name': 'Продукт в рецепте', 'verbose_name_plural': 'продукты в рецепте'},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'default_related_name': 'tags', 'ordering': ('id',), 'verbose_name': 'Тег', 'verbose_name_plural': 'теги'},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0018_related_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='receipt',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменено'),
+        ),
+    ]
@@ -1,15 +1,50 @@
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
 from django.contrib.auth.models import AbstractUser, models
+from django.utils import timezone
 
 from .constants import (
     MIN_COOKING_TIME,
     MIN_INGREDIENTS_AMOUNT,
     EMAIL_MAX_LENGTH,
     MAX_USERNAME_LENGTH,
+    TAGS_MASK_BITS,
 )
 
 
+def is_maskable(tag_id):
+    return 0 < tag_id < TAGS_MASK_BITS
+
+
+def tags_mask(tag_ids):
+    mask = 0
+    for tag_id in set(tag_ids):
+        if is_maskable(tag_id):
+            mask |= 1 << tag_id
+    return mask
+
+
+def with_any_tags(queryset, tag_ids, prefix=''):
+    tag_ids = set(tag_ids)
+    mask = tags_mask(tag_ids)
+    unmasked = [tag_id for tag_id in tag_ids if not is_maskable(tag_id)]
+    condition = models.Q()
+    if mask:
+        queryset = queryset.alias(
+            matching_tags=models.F(f'{prefix}tags_mask').bitand(mask)
+        )
+        condition |= ~models.Q(matching_tags=0)
+    if unmasked:
+        condition |= models.Q(**{
+            f'{prefix}pk__in': Receipt.tags.through.objects.filter(
+                tag_id__in=unmasked
+            ).values('receipt_id')
+        })
+    if not condition:
+        return queryset.none()
+    return queryset.filter(condition)
+
+
 class User(AbstractUser):
     username = models.CharField(
         max_length=MAX_USERNAME_LENGTH,
@@ -83,6 +118,7 @@ class Tag(models.Model):
 
     class Meta:
         default_related_name = 'tags'
+        ordering = ('id',)
         verbose_name = 'Тег'
         verbose_name_plural = 'теги'
 
@@ -109,6 +145,18 @@ class Ingredient(models.Model):
         return f'{self.name[:20]}, {self.measurement_unit}'
 
 
+class ReceiptQuerySet(models.QuerySet):
+
+    def with_any_tags(self, tag_ids):
+        return with_any_tags(self, tag_ids)
+
+    def touch(self):
+        return self.update(
+            version=models.F('version') + 1,
+            updated_at=timezone.now()
+        )
+
+
 class Receipt(models.Model):
     author = models.ForeignKey(
         User,
@@ -134,6 +182,11 @@ class Receipt(models.Model):
         Tag,
         verbose_name='Теги',
     )
+    tags_mask = models.BigIntegerField(
+        verbose_name='Битовая маска тегов',
+        default=0,
+        editable=False,
+    )
     cooking_time = models.PositiveIntegerField(
         verbose_name='Время приготовления',
         validators=(MinValueValidator(MIN_COOKING_TIME), ),
@@ -142,16 +195,69 @@ class Receipt(models.Model):
         verbose_name='Опубликовано',
         auto_now_add=True,
     )
+    popularity = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False,
+    )
+    version = models.BigIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Изменено',
+        default=timezone.now,
+    )
+
+    objects = ReceiptQuerySet.as_manager()
+
+    denormalized_fields = ('popularity', 'version')
 
     class Meta:
         default_related_name = 'recipes'
         verbose_name = 'Рецепт'
         verbose_name_plural = 'рецепты'
         ordering = ('-published_at', )
+        indexes = [
+            models.Index(
+                fields=('-published_at', '-id'),
+                name='receipt_published_idx',
+            ),
+            models.Index(
+                fields=('author', '-published_at'),
+                name='receipt_author_published_idx',
+            ),
+            models.Index(
+                fields=('-popularity', '-id'),
+                name='receipt_popularity_idx',
+            ),
+            models.Index(
+                fields=('author', '-popularity', '-id'),
+                name='receipt_author_popularity_idx',
+            ),
+            models.Index(
+                fields=('cooking_time', '-id'),
+                name='receipt_cooking_time_idx',
+            ),
+            models.Index(
+                fields=('updated_at',),
+                name='receipt_updated_at_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name[:20]
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.denormalized_fields
+            ]
+        super().save(*args, **kwargs)
+
 
 class IngredientInReceipt(models.Model):
     ingredient = models.ForeignKey(
@@ -178,6 +284,7 @@ class IngredientInReceipt(models.Model):
             )
         ]
         default_related_name = 'ingredients_in_receipts'
+        ordering = ('id',)
         verbose_name = 'Продукт в рецепте'
         verbose_name_plural = 'продукты в рецепте'
 
@@ -196,6 +303,10 @@ class UserRecipeBase(models.Model):
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField(
+        verbose_name='Добавлено',
+        default=timezone.now,
+    )
 
     class Meta:
         abstract = True
@@ -224,3 +335,194 @@ class ShoppingCart(UserRecipeBase):
         default_related_name = 'shopping_carts'
         verbose_name = 'Корзина покупок'
         verbose_name_plural = 'корзины покупок'
+
+
+class SimilarRecipe(models.Model):
+    receipt = models.ForeignKey(
+        Receipt,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+    )
+    similar = models.ForeignKey(
+        Receipt,
+        verbose_name='Похожий рецепт',
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+    )
+    score = models.FloatField(
+        verbose_name='Сходство',
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name='Место',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['receipt', 'rank'],
+                name='unique_receipt_similar_rank',
+            ),
+        ]
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'похожие рецепты'
+        ordering = ('receipt', 'rank')
+
+    def __str__(self):
+        return f'{self.receipt} {self.similar}'
+
+
+class SimilarRecipeRefresh(models.Model):
+    receipt_id = models.BigIntegerField(
+        verbose_name='ID рецепта',
+        primary_key=True,
+    )
+
+    class Meta:
+        verbose_name = 'Рецепт для пересчета похожих'
+        verbose_name_plural = 'рецепты для пересчета похожих'
+
+
+class RecipeStatistics(models.Model):
+    receipt = models.OneToOneField(
+        Receipt,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='statistics',
+    )
+    favourites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        verbose_name='В корзинах',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика рецепта'
+        verbose_name_plural = 'статистика рецептов'
+        ordering = ('-favourites_count',)
+        indexes = [
+            models.Index(
+                fields=('-favourites_count',),
+                name='recipe_stats_favourites_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.receipt)
+
+
+class IngredientStatistics(models.Model):
+    ingredient = models.OneToOneField(
+        Ingredient,
+        verbose_name='Продукт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='statistics',
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='В рецептах',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика продукта'
+        verbose_name_plural = 'статистика продуктов'
+        ordering = ('-recipes_count',)
+        indexes = [
+            models.Index(
+                fields=('-recipes_count',),
+                name='ingredient_stats_recipes_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.ingredient)
+
+
+class AuthorStatistics(models.Model):
+    author = models.OneToOneField(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='statistics',
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчики',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'статистика авторов'
+        ordering = ('-followers_count',)
+        indexes = [
+            models.Index(
+                fields=('-followers_count',),
+                name='author_stats_followers_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.author)
+
+
+class TagWeekStatistics(models.Model):
+    tag = models.ForeignKey(
+        Tag,
+        verbose_name='Тег',
+        on_delete=models.CASCADE,
+        related_name='week_statistics',
+    )
+    week = models.DateField(
+        verbose_name='Неделя',
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецепты',
+        default=0,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'week'],
+                name='unique_tag_week',
+            ),
+        ]
+        verbose_name = 'Рецепты тега за неделю'
+        verbose_name_plural = 'рецепты тегов по неделям'
+        ordering = ('-week', 'tag')
+
+    def __str__(self):
+        return f'{self.tag} {self.week}'
+
+
+class StatisticsWatermark(models.Model):
+    name = models.CharField(
+        max_length=64,
+        verbose_name='Источник',
+        unique=True,
+    )
+    last_id = models.BigIntegerField(
+        verbose_name='Последний учтенный ID',
+        default=0,
+    )
+    last_published_at = models.DateTimeField(
+        verbose_name='Последняя учтенная публикация',
+        null=True,
+    )
+    refreshed_at = models.DateTimeField(
+        verbose_name='Обновлено',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Отметка обновления статистики'
+        verbose_name_plural = 'отметки обновления статистики'
+
+    def __str__(self):
+        return self.name
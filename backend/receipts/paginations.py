@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .constants import (
+    ESTIMATED_COUNT_CACHE_TTL,
+    ESTIMATED_COUNT_THRESHOLD,
+)
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where or query.distinct:
+            return super().count
+        connection = connections[self.object_list.db]
+        table = self.object_list.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE oid = %s::regclass',
+                    [table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+            return super().count
+        cache_key = f'admin:estimated_count:{self.object_list.db}:{table}'
+        count = cache.get(cache_key)
+        if count is None:
+            count = super().count
+            if count >= ESTIMATED_COUNT_THRESHOLD:
+                cache.set(cache_key, count, ESTIMATED_COUNT_CACHE_TTL)
+        return count
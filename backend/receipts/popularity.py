@@ -0,0 +1,76 @@
+import math
+from datetime import datetime, timezone
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+from .constants import (
+    POPULARITY_FAVOURITE_WEIGHT,
+    POPULARITY_HALF_LIFE_DAYS,
+    POPULARITY_SHOPPING_CART_WEIGHT
+)
+from .models import Favourite, Receipt, ShoppingCart
+
+POPULARITY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DECAY_RATE = math.log(2) / (POPULARITY_HALF_LIFE_DAYS * 24 * 60 * 60)
+EMPTY_MARGIN = 1e-9
+POPULARITY_WEIGHTS = {
+    Favourite: POPULARITY_FAVOURITE_WEIGHT,
+    ShoppingCart: POPULARITY_SHOPPING_CART_WEIGHT,
+}
+
+
+def contribution(model, created_at):
+    return math.log(POPULARITY_WEIGHTS[model]) + DECAY_RATE * (
+        created_at - POPULARITY_EPOCH
+    ).total_seconds()
+
+
+def log_add(score, other):
+    return max(score, other) + math.log1p(math.exp(-abs(score - other)))
+
+
+def add_interaction(model, receipt_id, created_at, sign=1):
+    score = contribution(model, created_at)
+    popularity = F('popularity')
+    value = Value(score, output_field=FloatField())
+    if sign > 0:
+        popularity = Case(
+            When(popularity=0, then=value),
+            default=Greatest(popularity, value) + Ln(
+                Value(1.0) + Exp(-Abs(popularity - value))
+            ),
+        )
+    else:
+        popularity = Case(
+            When(
+                popularity__gt=score + EMPTY_MARGIN,
+                then=popularity + Ln(Value(1.0) - Exp(value - popularity))
+            ),
+            default=Value(0.0),
+        )
+    Receipt.objects.filter(pk=receipt_id).update(popularity=popularity)
+
+
+def recompute_popularity(batch_size=1000):
+    scores = {}
+    for model in POPULARITY_WEIGHTS:
+        rows = model.objects.values_list('receipt_id', 'created_at')
+        for receipt_id, created_at in rows.iterator():
+            score = contribution(model, created_at)
+            scores[receipt_id] = (
+                log_add(scores[receipt_id], score)
+                if receipt_id in scores else score
+            )
+    with transaction.atomic():
+        Receipt.objects.exclude(popularity=0).update(popularity=0)
+        Receipt.objects.bulk_update(
+            [
+                Receipt(pk=receipt_id, popularity=score)
+                for receipt_id, score in scores.items()
+            ],
+            ['popularity'],
+            batch_size=batch_size
+        )
+    return len(scores)
@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+)
+from django.dispatch import receiver
+
+from .constants import RECEIPT_AUTHOR_FIELDS
+from .models import (
+    Favourite,
+    Ingredient,
+    IngredientInReceipt,
+    Receipt,
+    ShoppingCart,
+    Tag,
+    is_maskable,
+    tags_mask
+)
+from .popularity import add_interaction
+from .similarity import mark_for_refresh
+from .statistics import (
+    INTERACTION_SOURCES,
+    discount_interaction,
+    discount_recipe
+)
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=Receipt.tags.through)
+def update_tags_mask(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.tags_mask = tags_mask(
+            instance.tags.values_list('id', flat=True)
+        )
+        Receipt.objects.filter(pk=instance.pk).update(
+            tags_mask=instance.tags_mask
+        )
+        return
+    if not is_maskable(instance.pk):
+        return
+    if action == 'post_add':
+        Receipt.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitor(tags_mask([instance.pk]))
+        )
+        return
+    recipes = Receipt.objects.with_any_tags([instance.pk])
+    if action == 'post_remove':
+        recipes = recipes.filter(pk__in=pk_set)
+    drop_tag_from_mask(recipes, instance.pk)
+
+
+@receiver(post_delete, sender=Tag)
+def drop_deleted_tag_from_mask(instance, **kwargs):
+    if not is_maskable(instance.pk):
+        return
+    drop_tag_from_mask(
+        Receipt.objects.with_any_tags([instance.pk]),
+        instance.pk
+    )
+
+
+def drop_tag_from_mask(recipes, tag_id):
+    recipes.update(tags_mask=F('tags_mask').bitand(~(1 << tag_id)))
+
+
+def connect_statistics_discounts():
+    for name, (model, *_) in INTERACTION_SOURCES.items():
+        post_delete.connect(
+            lambda instance, name=name, **kwargs: discount_interaction(
+                name, instance
+            ),
+            sender=model,
+            weak=False,
+            dispatch_uid=f'discount_{name}_statistics',
+        )
+
+
+connect_statistics_discounts()
+
+
+@receiver(pre_delete, sender=Receipt)
+def discount_deleted_recipe(instance, **kwargs):
+    discount_recipe(instance)
+
+
+@receiver((post_save, post_delete), sender=IngredientInReceipt)
+def mark_similar_recipes_for_refresh(instance, **kwargs):
+    mark_for_refresh([instance.receipt_id])
+
+
+@receiver(post_save, sender=Favourite)
+@receiver(post_save, sender=ShoppingCart)
+def add_popularity(sender, instance, created, **kwargs):
+    if created:
+        add_interaction(sender, instance.receipt_id, instance.created_at)
+
+
+@receiver(post_delete, sender=Favourite)
+@receiver(post_delete, sender=ShoppingCart)
+def remove_popularity(sender, instance, **kwargs):
+    add_interaction(
+        sender, instance.receipt_id, instance.created_at, sign=-1
+    )
+
+
+@receiver(post_save, sender=Receipt)
+def touch_saved_recipe(instance, created, **kwargs):
+    if not created:
+        Receipt.objects.filter(pk=instance.pk).touch()
+
+
+@receiver((post_save, post_delete), sender=IngredientInReceipt)
+def touch_recipe_of_ingredient(instance, **kwargs):
+    Receipt.objects.filter(pk=instance.receipt_id).touch()
+
+
+@receiver(m2m_changed, sender=Receipt.tags.through)
+def touch_retagged_recipes(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        Receipt.objects.filter(pk=instance.pk).touch()
+    elif action == 'pre_clear':
+        instance.recipes.all().touch()
+    else:
+        Receipt.objects.filter(pk__in=pk_set).touch()
+
+
+@receiver((post_save, pre_delete), sender=Tag)
+def touch_tagged_recipes(instance, **kwargs):
+    Receipt.objects.with_any_tags([instance.pk]).touch()
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_with_ingredient(instance, **kwargs):
+    Receipt.objects.filter(
+        ingredients_in_receipts__ingredient=instance
+    ).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(instance, created, update_fields, **kwargs):
+    if created or update_fields is not None and update_fields.isdisjoint(
+        RECEIPT_AUTHOR_FIELDS
+    ):
+        return
+    instance.recipes.all().touch()
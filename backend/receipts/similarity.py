@@ -0,0 +1,192 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.db import transaction
+from scipy.sparse import csr_matrix, diags
+
+from .constants import SIMILAR_RECIPES_COUNT, SIMILARITY_CHUNK_SIZE
+from .models import IngredientInReceipt, SimilarRecipe, SimilarRecipeRefresh
+
+_worker_matrix = None
+
+
+def load_matrix():
+    receipt_ids = array('q')
+    ingredient_ids = array('q')
+    rows = IngredientInReceipt.objects.values_list(
+        'receipt_id', 'ingredient_id'
+    ).iterator()
+    for receipt_id, ingredient_id in rows:
+        receipt_ids.append(receipt_id)
+        ingredient_ids.append(ingredient_id)
+    receipt_ids = np.frombuffer(receipt_ids, dtype=np.int64)
+    ingredient_ids = np.frombuffer(ingredient_ids, dtype=np.int64)
+    recipes, rows = np.unique(receipt_ids, return_inverse=True)
+    ingredients, columns = np.unique(ingredient_ids, return_inverse=True)
+    matrix = csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(len(recipes), len(ingredients))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    document_frequency = np.bincount(
+        matrix.indices, minlength=len(ingredients)
+    )
+    idf = np.log((1 + len(recipes)) / (1 + document_frequency)) + 1
+    weighted = (matrix @ diags(idf)).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)))
+    norms[norms == 0] = 1
+    return recipes, (diags(1 / norms.ravel()) @ weighted).tocsr()
+
+
+def init_worker(matrix):
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def top_neighbours(rows, matrix=None, count=SIMILAR_RECIPES_COUNT):
+    matrix = _worker_matrix if matrix is None else matrix
+    scores = (matrix[rows] @ matrix.T).tocsr()
+    neighbours = []
+    for position, row in enumerate(rows):
+        start, end = scores.indptr[position], scores.indptr[position + 1]
+        columns = scores.indices[start:end]
+        values = scores.data[start:end]
+        keep = (columns != row) & (values > 0)
+        columns, values = columns[keep], values[keep]
+        if len(values) > count:
+            best = np.argpartition(-values, count)[:count]
+            columns, values = columns[best], values[best]
+        order = np.lexsort((columns, -values))
+        neighbours.append((row, columns[order], values[order]))
+    return neighbours
+
+
+def chunked(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def compute_neighbours(matrix, rows, workers, chunk_size):
+    chunks = list(chunked(np.asarray(rows), chunk_size))
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield top_neighbours(chunk, matrix)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(matrix,)
+    ) as executor:
+        yield from executor.map(top_neighbours, chunks)
+
+
+def save_neighbours(recipes, neighbours):
+    receipt_ids = [int(recipes[row]) for row, _, _ in neighbours]
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(receipt_id__in=receipt_ids).delete()
+        SimilarRecipe.objects.bulk_create(
+            (
+                SimilarRecipe(
+                    receipt_id=int(recipes[row]),
+                    similar_id=int(recipes[column]),
+                    score=float(score),
+                    rank=rank,
+                )
+                for row, columns, scores in neighbours
+                for rank, (column, score) in enumerate(zip(columns, scores))
+            ),
+            batch_size=1000
+        )
+    return len(receipt_ids)
+
+
+def build_similar_recipes(workers=None, chunk_size=SIMILARITY_CHUNK_SIZE):
+    workers = workers or os.cpu_count() or 1
+    SimilarRecipeRefresh.objects.all().delete()
+    recipes, matrix = load_matrix()
+    processed = 0
+    for neighbours in compute_neighbours(
+        matrix, range(len(recipes)), workers, chunk_size
+    ):
+        processed += save_neighbours(recipes, neighbours)
+    SimilarRecipe.objects.filter(
+        receipt__ingredients_in_receipts__isnull=True
+    ).delete()
+    return processed
+
+
+def affected_rows(recipes, matrix, dirty_rows, dirty_ids,
+                  chunk_size=SIMILARITY_CHUNK_SIZE):
+    positions = {
+        receipt_id: row for row, receipt_id in enumerate(recipes.tolist())
+    }
+    rows = set(dirty_rows)
+    listed_rows = array('q')
+    listed_columns = array('q')
+    listed_scores = array('d')
+    for receipt_id, similar_id, score in SimilarRecipe.objects.filter(
+        similar_id__in=dirty_ids
+    ).values_list('receipt_id', 'similar_id', 'score').iterator():
+        if receipt_id not in positions:
+            continue
+        if similar_id not in positions:
+            rows.add(positions[receipt_id])
+            continue
+        listed_rows.append(positions[similar_id])
+        listed_columns.append(positions[receipt_id])
+        listed_scores.append(score)
+    if not dirty_rows:
+        return sorted(rows)
+    listed = csr_matrix(
+        (listed_scores, (listed_rows, listed_columns)),
+        shape=(len(recipes), len(recipes))
+    )
+    threshold = np.zeros(len(recipes))
+    for receipt_id, score in SimilarRecipe.objects.filter(
+        rank=SIMILAR_RECIPES_COUNT - 1
+    ).values_list('receipt_id', 'score').iterator():
+        if receipt_id in positions:
+            threshold[positions[receipt_id]] = score
+    for chunk in chunked(np.asarray(dirty_rows), chunk_size):
+        scores = (matrix[chunk] @ matrix.T).tocsr()
+        known = listed[chunk]
+        delta = (scores - known).tocoo()
+        is_known = np.asarray(known[delta.row, delta.col]).ravel() != 0
+        changed = is_known & ~np.isclose(delta.data, 0)
+        entered = ~is_known & (delta.data > threshold[delta.col])
+        rows.update(delta.col[changed | entered].tolist())
+    return sorted(rows)
+
+
+def refresh_similar_recipes(workers=1, chunk_size=SIMILARITY_CHUNK_SIZE):
+    dirty_ids = list(
+        SimilarRecipeRefresh.objects.values_list('receipt_id', flat=True)
+    )
+    if not dirty_ids:
+        return 0
+    recipes, matrix = load_matrix()
+    dirty_rows = np.flatnonzero(np.isin(recipes, dirty_ids)).tolist()
+    present = set(recipes[dirty_rows].tolist())
+    SimilarRecipe.objects.filter(
+        receipt_id__in=[pk for pk in dirty_ids if pk not in present]
+    ).delete()
+    processed = 0
+    for neighbours in compute_neighbours(
+        matrix,
+        affected_rows(recipes, matrix, dirty_rows, dirty_ids, chunk_size),
+        workers,
+        chunk_size
+    ):
+        processed += save_neighbours(recipes, neighbours)
+    SimilarRecipeRefresh.objects.filter(receipt_id__in=dirty_ids).delete()
+    return processed
+
+
+def mark_for_refresh(receipt_ids):
+    SimilarRecipeRefresh.objects.bulk_create(
+        [SimilarRecipeRefresh(receipt_id=pk) for pk in set(receipt_ids)],
+        ignore_conflicts=True
+    )
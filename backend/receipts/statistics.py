@@ -0,0 +1,190 @@
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from .constants import STATISTICS_PUBLICATION_LAG
+from .models import (
+    AuthorStatistics,
+    Favourite,
+    IngredientInReceipt,
+    IngredientStatistics,
+    Receipt,
+    RecipeStatistics,
+    ShoppingCart,
+    StatisticsWatermark,
+    Subscription,
+    TagWeekStatistics
+)
+
+INTERACTION_SOURCES = {
+    'favourites': (
+        Favourite, 'receipt', RecipeStatistics, 'favourites_count'
+    ),
+    'shopping_carts': (
+        ShoppingCart, 'receipt', RecipeStatistics, 'shopping_carts_count'
+    ),
+    'ingredients_in_recipes': (
+        IngredientInReceipt, 'ingredient', IngredientStatistics,
+        'recipes_count'
+    ),
+    'subscriptions': (
+        Subscription, 'author', AuthorStatistics, 'followers_count'
+    ),
+}
+TAG_WEEKS_SOURCE = 'tag_weeks'
+
+
+def get_watermark(name):
+    return StatisticsWatermark.objects.select_for_update().get_or_create(
+        name=name
+    )[0]
+
+
+def add_counts(model, key_field, count_field, counts):
+    existing = model.objects.in_bulk(list(counts))
+    updated = []
+    created = []
+    for key, count in counts.items():
+        if key in existing:
+            statistics = existing[key]
+            setattr(
+                statistics,
+                count_field,
+                getattr(statistics, count_field) + count
+            )
+            updated.append(statistics)
+        else:
+            created.append(
+                model(**{f'{key_field}_id': key, count_field: count})
+            )
+    model.objects.bulk_update(updated, [count_field], batch_size=1000)
+    model.objects.bulk_create(created, batch_size=1000)
+
+
+def refresh_interactions(name):
+    model, key_field, statistics_model, count_field = (
+        INTERACTION_SOURCES[name]
+    )
+    watermark = get_watermark(name)
+    rows = model.objects.filter(id__gt=watermark.last_id)
+    last_id = rows.aggregate(last_id=Max('id'))['last_id']
+    if last_id is None:
+        return 0
+    counts = dict(
+        rows.filter(id__lte=last_id).values_list(
+            f'{key_field}_id'
+        ).annotate(count=Count('id')).order_by()
+    )
+    add_counts(statistics_model, key_field, count_field, counts)
+    watermark.last_id = last_id
+    watermark.save()
+    return sum(counts.values())
+
+
+def refresh_tag_weeks():
+    watermark = get_watermark(TAG_WEEKS_SOURCE)
+    until = timezone.now() - timedelta(seconds=STATISTICS_PUBLICATION_LAG)
+    recipes = Receipt.objects.filter(published_at__lte=until)
+    if watermark.last_published_at is not None:
+        recipes = recipes.filter(
+            published_at__gt=watermark.last_published_at
+        )
+    last_published_at = recipes.aggregate(
+        last_published_at=Max('published_at')
+    )['last_published_at']
+    if last_published_at is None:
+        return 0
+    rows = Receipt.tags.through.objects.filter(
+        receipt__in=recipes.filter(published_at__lte=last_published_at)
+    ).values_list(
+        'tag_id',
+        TruncWeek('receipt__published_at', output_field=DateField())
+    ).annotate(count=Count('id')).order_by()
+    existing = {
+        (statistics.tag_id, statistics.week): statistics
+        for statistics in TagWeekStatistics.objects.filter(
+            week__in={week for _, week, _ in rows}
+        )
+    }
+    updated = []
+    created = []
+    total = 0
+    for tag_id, week, count in rows:
+        total += count
+        if (tag_id, week) in existing:
+            statistics = existing[tag_id, week]
+            statistics.recipes_count += count
+            updated.append(statistics)
+        else:
+            created.append(TagWeekStatistics(
+                tag_id=tag_id, week=week, recipes_count=count
+            ))
+    TagWeekStatistics.objects.bulk_update(updated, ['recipes_count'])
+    TagWeekStatistics.objects.bulk_create(created)
+    watermark.last_published_at = last_published_at
+    watermark.save()
+    return total
+
+
+def refresh_statistics(full=False):
+    report = []
+    if full:
+        with transaction.atomic():
+            for model in (
+                RecipeStatistics,
+                IngredientStatistics,
+                AuthorStatistics,
+                TagWeekStatistics,
+                StatisticsWatermark,
+            ):
+                model.objects.all().delete()
+    sources = [
+        (name, refresh_interactions, (name,))
+        for name in INTERACTION_SOURCES
+    ] + [(TAG_WEEKS_SOURCE, refresh_tag_weeks, ())]
+    for name, refresh, args in sources:
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = refresh(*args)
+        report.append((name, rows, time.perf_counter() - started))
+    return report
+
+
+def counted(name, instance_id):
+    return StatisticsWatermark.objects.filter(
+        name=name, last_id__gte=instance_id
+    ).exists()
+
+
+def discount_interaction(name, instance):
+    model, key_field, statistics_model, count_field = (
+        INTERACTION_SOURCES[name]
+    )
+    if counted(name, instance.id):
+        statistics_model.objects.filter(
+            pk=getattr(instance, f'{key_field}_id'),
+            **{f'{count_field}__gt': 0}
+        ).update(**{count_field: F(count_field) - 1})
+
+
+def discount_recipe(receipt):
+    watermark = StatisticsWatermark.objects.filter(
+        name=TAG_WEEKS_SOURCE
+    ).first()
+    if (
+        watermark is None
+        or watermark.last_published_at is None
+        or receipt.published_at > watermark.last_published_at
+    ):
+        return
+    week = timezone.localdate(receipt.published_at)
+    week -= timedelta(days=week.weekday())
+    TagWeekStatistics.objects.filter(
+        tag__in=receipt.tags.all(),
+        week=week,
+        recipes_count__gt=0
+    ).update(recipes_count=F('recipes_count') - 1)
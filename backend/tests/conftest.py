@@ -0,0 +1,82 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from receipts.models import (
+    Favourite,
+    Ingredient,
+    IngredientInReceipt,
+    Receipt,
+    ShoppingCart,
+    Subscription,
+    Tag
+)
+
+User = get_user_model()
+
+ROWS = 100
+
+
+@pytest.fixture
+def catalog(db):
+    users = [
+        User.objects.create(
+            username=f'user{number}',
+            email=f'user{number}@example.com',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        for number in range(11)
+    ]
+    tags = [
+        Tag.objects.create(name=f'Тег {number}', slug=f'tag-{number}')
+        for number in range(3)
+    ]
+    ingredients = [
+        Ingredient.objects.create(
+            name=f'Продукт {number}', measurement_unit='г'
+        )
+        for number in range(10)
+    ]
+    receipts = [
+        Receipt.objects.create(
+            author=users[number % len(users)],
+            name=f'Рецепт {number}',
+            image='receipts/image.png',
+            text='Описание',
+            cooking_time=number + 1,
+        )
+        for number in range(ROWS)
+    ]
+    Receipt.tags.through.objects.bulk_create(
+        Receipt.tags.through(receipt=receipt, tag=tag)
+        for receipt in receipts
+        for tag in tags[:2]
+    )
+    IngredientInReceipt.objects.bulk_create(
+        IngredientInReceipt(
+            receipt=receipt,
+            ingredient=ingredients[number % len(ingredients)],
+            amount=number + 1,
+        )
+        for number, receipt in enumerate(receipts)
+    )
+    for model in (Favourite, ShoppingCart):
+        model.objects.bulk_create(
+            model(user=users[number // 10], receipt=receipts[number])
+            for number in range(ROWS)
+        )
+    Subscription.objects.bulk_create(
+        Subscription(follower=follower, author=author)
+        for follower in users[:10]
+        for author in users
+        if author != follower
+    )
+    return users, receipts
+
+
+@pytest.fixture
+def admin_client(client, db):
+    client.force_login(User.objects.create_superuser(
+        username='admin', email='admin@example.com', password='password'
+    ))
+    return client
@@ -0,0 +1,24 @@
+import pytest
+from django.urls import reverse
+
+CHANGELIST_QUERIES = 10
+
+
+@pytest.mark.parametrize('model', (
+    'user',
+    'receipt',
+    'ingredient',
+    'tag',
+    'favourite',
+    'shoppingcart',
+    'subscription',
+    'ingredientinreceipt',
+))
+def test_changelist_queries_do_not_grow_with_page(
+    admin_client, catalog, django_assert_max_num_queries, model
+):
+    url = reverse(f'admin:receipts_{model}_changelist')
+    with django_assert_max_num_queries(CHANGELIST_QUERIES):
+        response = admin_client.get(url, {'o': '1'})
+    assert response.status_code == 200
+    assert response.context['cl'].result_list
@@ -0,0 +1,39 @@
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from django.urls import reverse
+
+User = get_user_model()
+
+
+def test_short_link_accepts_head(client, transactional_db, catalog):
+    _, receipts = catalog
+    url = reverse('receipt-short-link', kwargs={'receipt_id': receipts[0].id})
+    assert client.head(url).status_code == 302
+    response = client.post(url)
+    assert response.status_code == 405
+    assert response['Allow'] == 'GET, HEAD'
+
+
+def test_export_csv_under_asgi(transactional_db, catalog):
+    _, receipts = catalog
+    client = AsyncClient()
+    client.force_login(User.objects.create_superuser(
+        username='admin', email='admin@example.com', password='password'
+    ))
+
+    async def export():
+        return await client.post(
+            reverse('admin:receipts_receipt_changelist'),
+            urlencode({
+                'action': 'export_csv',
+                '_selected_action': [receipt.id for receipt in receipts[:3]],
+            }, doseq=True),
+            content_type='application/x-www-form-urlencoded'
+        )
+
+    response = async_to_sync(export)()
+    assert response.status_code == 200
+    assert len(response.content.decode().splitlines()) == 4
@@ -0,0 +1,37 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.caching import render_cached_receipts
+from api.fieldsets import Fieldset
+from api.renderers import ORJSONRenderer
+from api.serializers import ReceiptSerializer
+from receipts.constants import RECEIPT_FIELD_PROFILES
+from receipts.models import Receipt
+
+QUERIES = ('', 'fields=compact', 'omit=is_favorited,author.avatar')
+
+
+@pytest.mark.parametrize('query', QUERIES)
+@pytest.mark.parametrize('authenticated', (False, True))
+def test_cached_cards_match_serializer(catalog, authenticated, query):
+    users, _ = catalog
+    request = Request(APIRequestFactory().get(f'/api/recipes/?{query}'))
+    request.user = users[0] if authenticated else AnonymousUser()
+    fieldset = Fieldset.from_request(request, RECEIPT_FIELD_PROFILES)
+    queryset = Receipt.objects.order_by('-published_at', '-id')
+    expected = ORJSONRenderer().render(ReceiptSerializer(
+        queryset.select_related('author').prefetch_related(
+            'tags', 'ingredients_in_receipts__ingredient'
+        ),
+        many=True,
+        context={'request': request, 'fieldset': fieldset}
+    ).data)
+    page = list(queryset.values_list('id', 'version'))
+    cache.clear()
+    for _ in range(2):
+        assert ORJSONRenderer().render(
+            render_cached_receipts(page, request, fieldset)
+        ) == expected
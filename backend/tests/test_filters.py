@@ -0,0 +1,42 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api import filters
+from api.indexes import ingredient_recipe_index
+from receipts.models import IngredientInReceipt
+
+QUERIES = (
+    'ingredients={0}',
+    'ingredients={0},{1}',
+    'ingredients={0}&exclude_ingredients={1}',
+    'exclude_ingredients={0}',
+    'exclude_ingredients={0},{1}',
+)
+
+
+def recipe_ids(client, query):
+    response = client.get(f'/api/recipes/?{query}&limit=1000')
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.json()['results']]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_ingredient_filters_fall_back_to_subquery(
+    catalog, monkeypatch, query
+):
+    _, receipts = catalog
+    ingredient_ids = sorted({
+        row.ingredient_id
+        for receipt in receipts[:2]
+        for row in receipt.ingredients_in_receipts.all()
+    })
+    IngredientInReceipt.objects.create(
+        receipt=receipts[0], ingredient_id=ingredient_ids[1], amount=1
+    )
+    query = query.format(*ingredient_ids)
+    ingredient_recipe_index.invalidate()
+    client = APIClient()
+    indexed = recipe_ids(client, query)
+    monkeypatch.setattr(filters, 'INGREDIENT_INDEX_IDS_LIMIT', 0)
+    assert recipe_ids(client, query) == indexed
+    assert indexed
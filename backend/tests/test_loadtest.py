@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from api.loadtest import Connection
+
+RESPONSE = b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok'
+
+
+def serve(handler, scenario):
+    async def main():
+        server = await asyncio.start_server(handler, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(Connection('127.0.0.1', port, 0.2))
+        finally:
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_timeout_closes_connection():
+    async def handler(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        await asyncio.sleep(0.5)
+        writer.write(RESPONSE)
+
+    async def scenario(connection):
+        with pytest.raises(asyncio.TimeoutError):
+            await connection.request('GET', '/', {}, b'')
+        return connection.writer
+
+    assert serve(handler, scenario) is None
+
+
+@pytest.mark.parametrize('method, attempts', (('GET', 2), ('POST', 1)))
+def test_only_safe_methods_are_retried(method, attempts):
+    requests = []
+
+    async def handler(reader, writer):
+        first = not requests
+        while True:
+            try:
+                await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                return
+            requests.append(method)
+            if first and len(requests) == 2:
+                writer.close()
+                return
+            writer.write(RESPONSE)
+            await writer.drain()
+
+    async def scenario(connection):
+        await connection.request('GET', '/', {}, b'')
+        try:
+            await connection.request(method, '/', {}, b'')
+        except ConnectionError:
+            pass
+
+    serve(handler, scenario)
+    assert len(requests) == 1 + attempts
@@ -0,0 +1,40 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.PERFORMANCE_INSTRUMENTATION = True
+    settings.METRICS_TOKEN = 'scrape-token'
+    settings.METRICS_ALLOWED_IPS = ['10.0.0.5']
+    return reverse('metrics')
+
+
+@pytest.mark.parametrize('headers', (
+    {},
+    {'HTTP_AUTHORIZATION': 'Bearer wrong-token'},
+    {'REMOTE_ADDR': '10.0.0.6'},
+))
+def test_metrics_are_hidden_from_strangers(client, db, metrics, headers):
+    assert client.get(metrics, **headers).status_code in (401, 403)
+
+
+@pytest.mark.parametrize('headers', (
+    {'HTTP_AUTHORIZATION': 'Bearer scrape-token'},
+    {'REMOTE_ADDR': '10.0.0.5'},
+))
+def test_metrics_are_served_to_scrapers(client, db, metrics, headers):
+    assert client.get(metrics, **headers).status_code == 200
+
+
+def test_metrics_are_served_to_admins(client, db, metrics):
+    token = Token.objects.create(user=User.objects.create_superuser(
+        username='admin', email='admin@example.com', password='password'
+    ))
+    assert client.get(
+        metrics, HTTP_AUTHORIZATION=f'Token {token.key}'
+    ).status_code == 200
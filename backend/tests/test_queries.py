@@ -0,0 +1,24 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.inspection import query_report
+from api.management.commands.inspect_queries import representative_urls
+
+
+@pytest.fixture
+def inspecting_client(settings, transactional_db, catalog):
+    settings.QUERY_INSPECTION = 'raise'
+    settings.QUERY_INSPECTION_REPORT = ''
+    users, _ = catalog
+    client = APIClient()
+    client.force_authenticate(users[0])
+    yield client
+    query_report.endpoints.clear()
+
+
+@pytest.mark.parametrize('number', range(len(representative_urls(1, 1))))
+def test_endpoint_has_no_repeated_queries(inspecting_client, catalog, number):
+    users, receipts = catalog
+    url = representative_urls(users[0].id, receipts[0].id)[number]
+    response = inspecting_client.get(url)
+    assert response.status_code == 200, url
@@ -0,0 +1,85 @@
+import re
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+
+from receipts.constants import RECEIPT_ORDERINGS
+from receipts.models import (
+    Favourite,
+    IngredientInReceipt,
+    Receipt,
+    ShoppingCart,
+    Subscription
+)
+
+User = get_user_model()
+
+SEQUENTIAL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?!\s+USING)'),
+}
+
+
+def representative_queries(user_id, receipt_id):
+    return {
+        'recipes_list': Receipt.objects.all()[:6],
+        'recipes_by_author': Receipt.objects.filter(author_id=user_id)[:6],
+        'recipes_popular': Receipt.objects.order_by(
+            *RECEIPT_ORDERINGS['popular']
+        )[:6],
+        'recipes_by_author_popular': Receipt.objects.filter(
+            author_id=user_id
+        ).order_by(*RECEIPT_ORDERINGS['popular'])[:6],
+        'recipes_by_cooking_time': Receipt.objects.order_by(
+            *RECEIPT_ORDERINGS['cooking_time']
+        )[:6],
+        'recipes_in_shopping_cart': Receipt.objects.filter(
+            shopping_carts__user_id=user_id
+        )[:6],
+        'recipes_favorited': Receipt.objects.filter(
+            favourites__user_id=user_id
+        )[:6],
+        'is_in_shopping_cart': ShoppingCart.objects.filter(
+            user_id=user_id, receipt_id=receipt_id
+        ),
+        'is_favorited': Favourite.objects.filter(
+            user_id=user_id, receipt_id=receipt_id
+        ),
+        'is_subscribed': Subscription.objects.filter(
+            follower_id=user_id, author_id=user_id
+        ),
+        'subscriptions': User.objects.filter(
+            authors__follower_id=user_id
+        )[:6],
+        'subscribers_count': Subscription.objects.filter(author_id=user_id),
+        'author_recipes': Receipt.objects.filter(author_id=user_id)[:3],
+        'receipt_ingredients': IngredientInReceipt.objects.filter(
+            receipt_id=receipt_id
+        ).select_related('ingredient'),
+        'shopping_list': IngredientInReceipt.objects.filter(
+            receipt__shopping_carts__user_id=user_id
+        ).values(
+            'ingredient__name',
+            'ingredient__measurement_unit'
+        ).annotate(total_amount=Sum('amount')),
+    }
+
+
+QUERIES = tuple(representative_queries(0, 0))
+
+
+@pytest.mark.parametrize('name', QUERIES)
+def test_query_plan_has_no_sequential_scan(catalog, name):
+    pattern = SEQUENTIAL_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        pytest.skip(f'Планы для {connection.vendor} не поддерживаются.')
+    users, receipts = catalog
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+    plan = representative_queries(users[0].id, receipts[0].id)[
+        name
+    ].explain()
+    assert not pattern.findall(plan), plan
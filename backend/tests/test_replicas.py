@@ -0,0 +1,74 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.executors import wrap_execute
+from api.replicas import replica_aliases
+from receipts.constants import PRIMARY_PIN_COOKIE
+
+pytestmark = [
+    pytest.mark.skipif(
+        not replica_aliases(), reason='Реплики не настроены (DB_REPLICAS).'
+    ),
+    pytest.mark.django_db(transaction=True, databases='__all__'),
+]
+
+
+def served_by(client, method, url):
+    aliases = set()
+
+    def execute(execute, sql, params, many, context):
+        aliases.add(context['connection'].alias)
+        return execute(sql, params, many, context)
+
+    with wrap_execute(execute):
+        response = getattr(client, method)(url)
+    assert response.status_code < 400, response.content
+    if aliases == {DEFAULT_DB_ALIAS}:
+        return response, 'primary'
+    if aliases and DEFAULT_DB_ALIAS not in aliases:
+        return response, 'replica'
+    return response, ','.join(sorted(aliases)) or 'none'
+
+
+@pytest.fixture
+def clients(catalog):
+    users, receipts = catalog
+    cache.clear()
+    authorization = f'Token {Token.objects.create(user=users[-1]).key}'
+    client, other_client = APIClient(), APIClient()
+    for token_client in (client, other_client):
+        token_client.credentials(HTTP_AUTHORIZATION=authorization)
+    return client, other_client, receipts[0]
+
+
+def test_reads_go_to_replica(clients):
+    client, _, receipt = clients
+    for reader, url in (
+        (APIClient(), reverse('recipes-list')),
+        (client, reverse('recipes-detail', kwargs={'pk': receipt.id})),
+    ):
+        assert served_by(reader, 'get', url)[1] == 'replica'
+
+
+def test_write_pins_reads_to_primary(clients, settings):
+    settings.PRIMARY_PIN_SECONDS = 1
+    client, other_client, receipt = clients
+    detail = reverse('recipes-detail', kwargs={'pk': receipt.id})
+    response, database = served_by(
+        client, 'post', reverse('recipes-favorite', kwargs={'pk': receipt.id})
+    )
+    assert database == 'primary'
+    assert response.cookies[PRIMARY_PIN_COOKIE]['max-age'] == 1
+    response, database = served_by(client, 'get', detail)
+    assert database == 'primary'
+    assert response.data['is_favorited']
+    assert served_by(other_client, 'get', detail)[1] == 'primary'
+    assert served_by(APIClient(), 'get', detail)[1] == 'replica'
+    time.sleep(1.1)
+    assert served_by(other_client, 'get', detail)[1] == 'replica'
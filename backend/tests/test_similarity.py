@@ -0,0 +1,63 @@
+import random
+
+from receipts.models import (
+    Ingredient,
+    IngredientInReceipt,
+    Receipt,
+    SimilarRecipe
+)
+from receipts.similarity import (
+    build_similar_recipes,
+    mark_for_refresh,
+    refresh_similar_recipes
+)
+
+
+def neighbours():
+    return {
+        (receipt_id, similar_id, rank): round(score, 9)
+        for receipt_id, similar_id, rank, score in
+        SimilarRecipe.objects.values_list(
+            'receipt_id', 'similar_id', 'rank', 'score'
+        )
+    }
+
+
+def swap(first, second):
+    ingredients = [
+        set(receipt.ingredients.values_list('id', flat=True))
+        for receipt in (first, second)
+    ]
+    given = min(ingredients[0] - ingredients[1])
+    taken = min(ingredients[1] - ingredients[0])
+    IngredientInReceipt.objects.filter(
+        receipt=first, ingredient_id=given
+    ).update(ingredient_id=taken)
+    IngredientInReceipt.objects.filter(
+        receipt=second, ingredient_id=taken
+    ).update(ingredient_id=given)
+
+
+def test_refresh_matches_full_rebuild(catalog):
+    receipts = list(Receipt.objects.order_by('id'))
+    ingredients = list(Ingredient.objects.order_by('id'))
+    ingredients += Ingredient.objects.bulk_create(
+        Ingredient(name=f'Редкий продукт {number}', measurement_unit='г')
+        for number in range(20)
+    )
+    ingredients = list(Ingredient.objects.order_by('id'))
+    pick = random.Random(0)
+    IngredientInReceipt.objects.bulk_create(
+        IngredientInReceipt(receipt=receipt, ingredient=ingredient, amount=1)
+        for receipt in receipts
+        for ingredient in pick.sample(ingredients[10:], 4)
+    )
+    build_similar_recipes(workers=1)
+    swap(receipts[0], receipts[1])
+    swap(receipts[2], receipts[3])
+    mark_for_refresh([receipt.id for receipt in receipts[:4]])
+    processed = refresh_similar_recipes(chunk_size=3)
+    refreshed = neighbours()
+    build_similar_recipes(workers=1)
+    assert refreshed == neighbours()
+    assert 4 <= processed < len(receipts)